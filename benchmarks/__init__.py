@@ -0,0 +1 @@
+"""Offline benchmarks: the pipeline stages timed against local fakes of every external service."""
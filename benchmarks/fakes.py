@@ -0,0 +1,219 @@
+"""
+Local stand-ins for the external services, with configurable latency and
+error injection. Each fake mimics the part of the real client API the app
+uses, so it can be dropped in through the client registry or the
+backend / engine parameters of the core classes.
+"""
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class InjectedError(Exception):
+    """Raised by a fake when error injection triggers."""
+
+
+class Behaviour:
+    """Latency (fixed + per unit of work) and error rate shared by the fakes."""
+
+    def __init__(self, latency=0.0, per_unit=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.per_unit = per_unit
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, units=0, service="fake"):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+            if fail:
+                self.errors += 1
+        delay = self.latency + units * self.per_unit + jitter
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise InjectedError(f"{service}: injected failure")
+
+
+# ---------- Gemini (google-genai Client) ----------
+
+def _usage(prompt_tokens, output_tokens):
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens, candidates_token_count=output_tokens, thoughts_token_count=0
+    )
+
+
+class _FakeModels:
+    def __init__(self, behaviour, output_words, stream_pieces):
+        self.behaviour = behaviour
+        self.output_words = output_words
+        self.stream_pieces = stream_pieces
+
+    def _notes(self, contents):
+        words = contents.split()
+        return " ".join(["- note"] + words[-self.output_words:])
+
+    def generate_content(self, model, contents, **kwargs):
+        self.behaviour(len(contents) // 4, "gemini")
+        text = self._notes(contents)
+        return SimpleNamespace(text=text, usage_metadata=_usage(len(contents) // 4, len(text) // 4))
+
+    def generate_content_stream(self, model, contents, **kwargs):
+        self.behaviour(len(contents) // 4, "gemini")
+        text = self._notes(contents)
+        step = max(len(text) // self.stream_pieces, 1)
+        for i in range(0, len(text), step):
+            yield SimpleNamespace(text=text[i:i + step], usage_metadata=_usage(len(contents) // 4, (i + step) // 4))
+
+    def count_tokens(self, model, contents, **kwargs):
+        return SimpleNamespace(total_tokens=len(contents) // 4 + 1)
+
+
+class FakeGeminiClient:
+    def __init__(self, behaviour=None, output_words=200, stream_pieces=20):
+        self.models = _FakeModels(behaviour or Behaviour(), output_words, stream_pieces)
+
+
+# ---------- youtube_transcript_api ----------
+
+_WORDS = (
+    "so today we are going to talk about attention transformers and how the model learns "
+    "um [Music] the the encoder decoder layers gradient descent training data you know"
+).split()
+
+
+def fake_snippets(seconds, segment_seconds=3.0, seed=0):
+    """Caption-like snippets covering `seconds` of video, about 2.5 words per second."""
+    rng = random.Random(seed)
+    snippets = []
+    start = 0.0
+    words_per_segment = max(int(segment_seconds * 2.5), 1)
+    while start < seconds:
+        text = " ".join(rng.choice(_WORDS) for _ in range(words_per_segment))
+        snippets.append(SimpleNamespace(text=text, start=start, duration=segment_seconds))
+        start += segment_seconds
+    return snippets
+
+
+class FakeTranscript(list):
+    language_code = "en"
+
+
+class FakeTranscriptApi:
+    """
+    fetch(video_id) returns a transcript whose length comes from the id:
+    "bench-3600" is one hour of captions.
+    """
+
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour or Behaviour()
+
+    def fetch(self, video_id, **kwargs):
+        seconds = float(video_id.rsplit("-", 1)[-1]) if "-" in video_id else 600.0
+        self.behaviour(seconds / 60, "transcript")
+        return FakeTranscript(fake_snippets(seconds))
+
+
+# ---------- YouTube Data API (googleapiclient build()) ----------
+
+class _FakeRequest:
+    def __init__(self, behaviour, units, response):
+        self.behaviour = behaviour
+        self.units = units
+        self.response = response
+
+    def execute(self, **kwargs):
+        self.behaviour(self.units, "youtube")
+        return self.response
+
+
+class _FakeVideos:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+
+    def list(self, part, id, **kwargs):
+        ids = [video_id for video_id in id.split(",") if video_id]
+        items = [
+            {
+                "id": video_id,
+                "snippet": {"title": f"Video {video_id}", "description": "A benchmark video.", "channelTitle": "Bench"},
+                "contentDetails": {"duration": f"PT{video_id.rsplit('-', 1)[-1]}S" if "-" in video_id else "PT600S"},
+            }
+            for video_id in ids
+        ]
+        return _FakeRequest(self.behaviour, len(ids), {"items": items})
+
+
+class _FakePlaylistItems:
+    """
+    Playlist "PL<name>-<count>" holds <count> videos of 10 minutes; a
+    channel's uploads playlist "UU<name>-<count>" works the same way.
+    """
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+
+    def list(self, part, playlistId, maxResults=5, pageToken=None, **kwargs):
+        count = int(playlistId.rsplit("-", 1)[-1]) if "-" in playlistId else 0
+        start = int(pageToken or 0)
+        end = min(start + maxResults, count)
+        response = {"items": [{"contentDetails": {"videoId": f"pl{n:04d}-600"}} for n in range(start, end)]}
+        if end < count:
+            response["nextPageToken"] = str(end)
+        return _FakeRequest(self.behaviour, end - start, response)
+
+
+class _FakeChannels:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+
+    def list(self, part, forHandle=None, forUsername=None, **kwargs):
+        name = (forHandle or forUsername or "").lstrip("@")
+        items = [{"contentDetails": {"relatedPlaylists": {"uploads": f"UU{name}"}}}] if name else []
+        return _FakeRequest(self.behaviour, 1, {"items": items})
+
+
+class FakeYouTubeDataClient:
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour or Behaviour()
+
+    def videos(self):
+        return _FakeVideos(self.behaviour)
+
+    def playlistItems(self):
+        return _FakePlaylistItems(self.behaviour)
+
+    def channels(self):
+        return _FakeChannels(self.behaviour)
+
+
+# ---------- deep_translator GoogleTranslator ----------
+
+class FakeTranslateBackend:
+    """ChunkTranslator backend: translate(text, source, target) with latency per 1000 characters."""
+
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour or Behaviour()
+
+    def translate(self, text, source, target):
+        self.behaviour(len(text) / 1000, "translate")
+        return "\n".join(f"[{target}] {line}" if line.strip() else line for line in text.split("\n"))
+
+
+# ---------- gTTS ----------
+
+class FakeTTSEngine:
+    """TextToSpeech engine: returns fake MP3 bytes, about 1 KB per 15 characters."""
+
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour or Behaviour()
+
+    def __call__(self, text, lang, slow):
+        self.behaviour(len(text) / 100, "tts")
+        return b"\xff\xfb" + b"\x00" * (len(text) * 1024 // 15)
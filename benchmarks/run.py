@@ -0,0 +1,288 @@
+"""
+Offline benchmark of the summarize / translate / TTS / export pipeline.
+
+    python -m benchmarks.run --sizes 1m,10m,1h,10h --repeat 3
+    python -m benchmarks.run --sizes 1m --playlist 100
+    python -m benchmarks.run --compare benchmarks/results/bench-<old>.json
+
+Every external service is replaced by the fakes in benchmarks/fakes.py, so
+no network access or API keys are needed. Latencies of the fakes are scaled
+with --latency-scale (0 measures pure local compute) and --error-rate
+injects failures. --playlist N also times the metadata of an N video
+playlist, one videos.list request per video against batched requests.
+Results are written as JSON; --compare prints the change per stage and
+size against an earlier run and exits with 1 on regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.fakes import (
+    Behaviour,
+    FakeGeminiClient,
+    FakeTranscriptApi,
+    FakeTranslateBackend,
+    FakeTTSEngine,
+    FakeYouTubeDataClient,
+)
+from core.clients import get_registry
+from core.exports import get_download_data
+from core.outbound import SERVICE_DEFAULTS, get_outbound
+from core.pipeline import normalize_transcript
+from core.summarize import DEFAULT_PROMPT, Summarizer
+from core.translation import ChunkTranslator
+from core.translation_memory import paragraph_hash
+from core.tts import TextToSpeech
+from core.youtube import extract_video_id, fetch_video_details, fetch_videos_details, list_collection, load_transcript
+
+SIZES = {"1m": 60, "10m": 600, "1h": 3600, "10h": 36000}
+
+# (fixed seconds, seconds per unit) per service at --latency-scale 1
+LATENCIES = {
+    "gemini": (0.05, 0.00001),       # unit: input token
+    "transcript": (0.02, 0.0005),    # unit: minute of video
+    "youtube": (0.02, 0.0),          # unit: video id
+    "translate": (0.01, 0.002),      # unit: 1000 characters
+    "tts": (0.005, 0.001),           # unit: 100 characters
+}
+
+
+def _behaviour(service, scale, error_rate):
+    latency, per_unit = LATENCIES[service]
+    return Behaviour(latency * scale, per_unit * scale, error_rate=error_rate)
+
+
+def _outbound_limits(scale):
+    """
+    The fakes have no quota: no rate limits, so the benchmarks time the code
+    rather than the limiter, and retry backoffs scaled like the latencies.
+    """
+    return {
+        name: (1e9, 1e9, attempts, base_delay * scale, max_delay * scale)
+        for name, (_, _, attempts, base_delay, max_delay) in SERVICE_DEFAULTS.items()
+    }
+
+
+def _paragraphs(text, words_per_paragraph=60):
+    """Re-flow a transcript into paragraphs, the shape translate_text gets from notes."""
+    words = text.split()
+    return "\n".join(" ".join(words[i:i + words_per_paragraph]) for i in range(0, len(words), words_per_paragraph))
+
+
+def _measure(func, repeat):
+    timings, errors = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+        timings.append(time.perf_counter() - started)
+    return timings, errors
+
+
+def _row(stage, size, timings, errors, chars):
+    median = statistics.median(timings)
+    return {
+        "stage": stage,
+        "size": size,
+        "runs": len(timings),
+        "errors": errors,
+        "p50_ms": round(median * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+        "chars": chars,
+        "chars_per_s": round(chars / median, 1) if median > 0 and chars else None,
+    }
+
+
+def run_playlist(videos, repeat, behaviour):
+    """Playlist metadata one video at a time against batched requests; rows carry the request count."""
+    url = f"https://www.youtube.com/playlist?list=PLbench-{videos}"
+    rows = []
+
+    def per_video():
+        for video_id in list_collection(url, "bench"):
+            fetch_video_details(video_id, "bench")
+
+    def batched():
+        fetch_videos_details(list_collection(url, "bench"), "bench")
+
+    for name, func in (("per_video", per_video), ("batched", batched)):
+        calls = behaviour.calls
+        timings, errors = _measure(func, repeat)
+        row = _row(f"playlist_metadata:{name}", f"{videos}v", timings, errors, 0)
+        row["requests"] = (behaviour.calls - calls) // repeat
+        rows.append(row)
+    print(f"playlist {videos}: done", file=sys.stderr, flush=True)
+    return rows
+
+
+def run(sizes, repeat=3, latency_scale=1.0, error_rate=0.0, workers=8, playlist=0):
+    registry = get_registry()
+    youtube_behaviour = _behaviour("youtube", latency_scale, error_rate)
+    registry.override("transcript", FakeTranscriptApi(_behaviour("transcript", latency_scale, error_rate)))
+    registry.override("youtube", FakeYouTubeDataClient(youtube_behaviour))
+    get_outbound().override(_outbound_limits(latency_scale))
+    summarizer = Summarizer(FakeGeminiClient(_behaviour("gemini", latency_scale, error_rate)), max_workers=workers)
+    translate_behaviour = _behaviour("translate", latency_scale, error_rate)
+    tts_behaviour = _behaviour("tts", latency_scale, error_rate)
+    batcher = ChunkTranslator(FakeTranslateBackend(), max_workers=1)
+
+    rows = []
+    try:
+        for size in sizes:
+            seconds = SIZES[size]
+            url = f"https://www.youtube.com/watch?v=bench-{seconds}"
+            video_id = extract_video_id(url)
+
+            started = time.perf_counter()
+            for _ in range(10000):
+                extract_video_id(url)
+            per_call = (time.perf_counter() - started) / 10000
+            rows.append(_row("extract_video_id", size, [per_call], 0, len(url)))
+
+            fetched = {}
+
+            def fetch():
+                fetched["transcript"], fetched["segments"] = load_transcript(video_id)
+
+            timings, errors = _measure(fetch, repeat)
+            if "segments" not in fetched:
+                # every fetch failed under error injection, nothing to feed the later stages
+                rows.append(_row("transcript_fetch", size, timings, errors, 0))
+                continue
+            raw = fetched["transcript"]
+            rows.append(_row("transcript_fetch", size, timings, errors, len(raw)))
+
+            timings, errors = _measure(lambda: normalize_transcript(raw, fetched["segments"]), repeat)
+            rows.append(_row("normalize", size, timings, errors, len(raw)))
+            text, _ = normalize_transcript(raw, fetched["segments"])
+
+            timings, errors = _measure(lambda: summarizer.generate(text, DEFAULT_PROMPT), repeat)
+            rows.append(_row("summarize", size, timings, errors, len(text)))
+
+            notes = _paragraphs(text)
+            def batches():
+                # what translate_many does before any request: hash the paragraphs, batch the missing ones
+                lines = notes.split("\n")
+                hashes = [paragraph_hash(line) if line.strip() else None for line in lines]
+                paragraphs = {h: line.strip() for h, line in zip(hashes, lines) if h}
+                return list(batcher._batches(list(paragraphs), paragraphs))
+
+            timings, errors = _measure(batches, repeat)
+            rows.append(_row("translate_batches", size, timings, errors, len(notes)))
+
+            def translate():
+                translator = ChunkTranslator(FakeTranslateBackend(translate_behaviour), max_workers=workers)
+                try:
+                    translator.translate(notes, "hi")
+                finally:
+                    translator.shutdown()
+
+            timings, errors = _measure(translate, repeat)
+            rows.append(_row("translate_text", size, timings, errors, len(notes)))
+
+            def speak():
+                TextToSpeech(engine=FakeTTSEngine(tts_behaviour), max_workers=workers).synthesize_long(text)
+
+            timings, errors = _measure(speak, repeat)
+            rows.append(_row("text_to_speech", size, timings, errors, len(text)))
+
+            for export_format in ("Word", "Text"):
+                timings, errors = _measure(lambda: get_download_data(export_format, notes), repeat)
+                rows.append(_row(f"get_download_data:{export_format}", size, timings, errors, len(notes)))
+
+            print(f"{size}: done", file=sys.stderr, flush=True)
+        if playlist:
+            rows += run_playlist(playlist, repeat, youtube_behaviour)
+    finally:
+        registry.override("transcript", None)
+        registry.override("youtube", None)
+        get_outbound().override(None)
+        batcher.shutdown()
+    return rows
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(rows, baseline_rows, threshold):
+    """Print p50 changes against a baseline; returns the rows that regressed beyond `threshold`."""
+    baseline = {(row["stage"], row["size"]): row for row in baseline_rows}
+    regressions = []
+    print(f"{'stage':<26}{'size':>5}{'base p50 ms':>14}{'p50 ms':>12}{'change':>9}")
+    for row in rows:
+        old = baseline.get((row["stage"], row["size"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = row["p50_ms"] / old["p50_ms"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{row['stage']:<26}{row['size']:>5}{old['p50_ms']:>14.2f}{row['p50_ms']:>12.2f}{change:>+9.1%}{flag}")
+        if flag:
+            regressions.append(row)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks against local fakes.")
+    parser.add_argument("--sizes", default="1m,10m,1h,10h", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage and size (default: 3)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="scale of the fake latencies, 0 = none")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability that a fake call fails")
+    parser.add_argument("--workers", type=int, default=8, help="worker pool size for the concurrent stages")
+    parser.add_argument("--playlist", type=int, default=0, help="also time the metadata of a playlist of N videos")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    rows = run(sizes, args.repeat, args.latency_scale, args.error_rate, args.workers, args.playlist)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency_scale": args.latency_scale,
+            "error_rate": args.error_rate,
+            "workers": args.workers,
+            "playlist": args.playlist,
+        },
+        "results": rows,
+    }
+    out = args.out or os.path.join("benchmarks", "results", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(rows)} results to {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(rows, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
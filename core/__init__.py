@@ -0,0 +1 @@
+"""UI-free building blocks shared by the Streamlit pages."""
@@ -0,0 +1,116 @@
+"""
+Headless batch summarizer.
+
+    python -m core.batch urls.txt --out batch_output --workers 8 --translate hi,ta --format Word
+
+Reads one YouTube URL per line, runs fetch -> summarize -> translate -> export
+for each on a worker pool, writes the files and a results.jsonl log into the
+output directory as items finish, and prints per-item status and throughput.
+Playlist and channel URLs are expanded into their videos (--max-videos each).
+Reruns skip URLs that already succeeded.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from core.clients import gemini_client
+from core.exports import FORMATS
+from core.ingest import COLLECTION_MAX_VIDEOS, expand_urls
+from core.pipeline import ResultLog, process_video
+from core.routing import ModelRouter
+from core.summarize import DEFAULT_PROMPT
+from core.summary_cache import ChunkCheckpoints, SummaryCache, TranscriptCache
+from core.translation import ChunkTranslator
+from core.translation_memory import TranslationMemory
+
+
+def read_urls(path):
+    with open(path, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    # keep the first occurrence of every URL
+    return list(dict.fromkeys(urls))
+
+
+def run_batch(urls, summarizer, out_dir, workers=4, translator=None, targets=(), export_format="Word",
+              prompt=DEFAULT_PROMPT, youtube_api_key=None, transcript_cache=None, on_result=None, details=None):
+    """Process `urls` concurrently; returns totals and throughput for the run."""
+    os.makedirs(out_dir, exist_ok=True)
+    log = ResultLog(os.path.join(out_dir, "results.jsonl"))
+    done = log.completed_urls()
+    pending = [url for url in urls if url not in done]
+
+    counts = {}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [
+            pool.submit(process_video, url, summarizer, out_dir, translator, targets, export_format,
+                        prompt, youtube_api_key, transcript_cache, details)
+            for url in pending
+        ]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            log.append(result)
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            if on_result:
+                on_result(finished, len(pending), result)
+
+    elapsed = time.monotonic() - started
+    return {
+        "skipped": len(urls) - len(pending),
+        "processed": len(pending),
+        "statuses": counts,
+        "seconds": round(elapsed, 3),
+        "videos_per_minute": round(len(pending) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def _print_result(finished, total, result):
+    line = f"[{finished}/{total}] {result['status']:<13} {result['video_id'] or '-':<12} {result['seconds']:>7.1f}s {result['url']}"
+    if result["error"]:
+        line += f"  ({result['error']})"
+    print(line, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize many YouTube videos without the Streamlit UI.")
+    parser.add_argument("urls_file", help="text file with one YouTube URL per line")
+    parser.add_argument("--out", default="batch_output", help="output directory (default: batch_output)")
+    parser.add_argument("--workers", type=int, default=4, help="videos processed concurrently (default: 4)")
+    parser.add_argument("--translate", default="", help="comma separated target languages, e.g. hi,ta")
+    parser.add_argument("--format", dest="export_format", default="Word",
+                        choices=list(FORMATS), help="export format (default: Word)")
+    parser.add_argument("--prompt-file", help="file with a custom summarization prompt")
+    parser.add_argument("--max-videos", type=int, default=COLLECTION_MAX_VIDEOS,
+                        help=f"videos taken from each playlist or channel URL (default: {COLLECTION_MAX_VIDEOS})")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    prompt = DEFAULT_PROMPT
+    if args.prompt_file:
+        with open(args.prompt_file, "r", encoding="utf-8") as f:
+            prompt = f.read()
+    targets = [lang.strip() for lang in args.translate.split(",") if lang.strip()]
+
+    summarizer = ModelRouter(gemini_client(), cache=SummaryCache(), checkpoints=ChunkCheckpoints())
+    translator = ChunkTranslator(memory=TranslationMemory()) if targets else None
+
+    youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+    urls, details = expand_urls(read_urls(args.urls_file), youtube_api_key, args.max_videos)
+    totals = run_batch(urls, summarizer, args.out, workers=args.workers, translator=translator,
+                       targets=targets, export_format=args.export_format, prompt=prompt,
+                       youtube_api_key=youtube_api_key, transcript_cache=TranscriptCache(),
+                       on_result=_print_result, details=details)
+
+    print(
+        f"Processed {totals['processed']} videos ({totals['skipped']} already done) in {totals['seconds']}s, "
+        f"{totals['videos_per_minute']} videos/min, statuses: {totals['statuses']}"
+    )
+    return 0 if set(totals["statuses"]) <= {"ok"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+from core import outbound
+from core.metrics import get_metrics
+
+# Input / output token limits and list prices in USD per million tokens.
+# Prices change; override them with GEMINI_PRICE_INPUT / GEMINI_PRICE_OUTPUT.
+MODEL_LIMITS = {
+    "models/gemini-flash-latest": {"input": 1_048_576, "output": 65_536, "price_input": 0.30, "price_output": 2.50},
+    "models/gemini-flash-lite-latest": {"input": 1_048_576, "output": 65_536, "price_input": 0.10, "price_output": 0.40},
+    "models/gemini-pro-latest": {"input": 1_048_576, "output": 65_536, "price_input": 1.25, "price_output": 10.00},
+}
+DEFAULT_LIMITS = {"input": 32_768, "output": 8_192, "price_input": 0.0, "price_output": 0.0}
+OUTPUT_RESERVE = int(os.getenv("SUMMARY_OUTPUT_RESERVE", "8192"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥。？！])\s+")
+
+
+def model_limits(model):
+    limits = dict(MODEL_LIMITS.get(model, DEFAULT_LIMITS))
+    if os.getenv("GEMINI_PRICE_INPUT"):
+        limits["price_input"] = float(os.getenv("GEMINI_PRICE_INPUT"))
+    if os.getenv("GEMINI_PRICE_OUTPUT"):
+        limits["price_output"] = float(os.getenv("GEMINI_PRICE_OUTPUT"))
+    return limits
+
+
+_ASCII_PUNCT = re.compile(r"[^A-Za-z0-9\s]")
+_WHITESPACE = re.compile(r"\s")
+
+
+@lru_cache(maxsize=4096)
+def _char_weight(ch):
+    if ch.isspace():
+        return 0.0
+    if ch.isascii():
+        return 0.25 if ch.isalnum() else 0.5
+    name = unicodedata.name(ch, "")
+    if name.startswith(("CJK", "HIRAGANA", "KATAKANA", "HANGUL")):
+        return 1.0
+    if name.startswith("LATIN"):
+        return 0.35
+    # Indic, Arabic, Cyrillic, ... tokenize much finer than English
+    return 0.5
+
+
+def estimate_tokens(text):
+    """
+    Local, script-aware token estimate used when the counting API is not
+    available. Errs on the high side so a fitted input never overflows.
+    """
+    text = text or ""
+    if text.isascii():
+        # fast path for English: alphanumerics ~4 per token, punctuation ~1 each
+        punctuation = len(_ASCII_PUNCT.findall(text))
+        alphanumeric = len(text) - punctuation - len(_WHITESPACE.findall(text))
+        return int(alphanumeric * 0.25 + punctuation * 0.5) + 1
+    return int(sum(map(_char_weight, text))) + 1
+
+
+class TokenCounter:
+    """
+    Counts tokens with Gemini's count_tokens API, through the outbound
+    "gemini" service, falling back to estimate_tokens. API failures that
+    forced a fallback are counted in token_count_fallbacks_total.
+    """
+
+    def __init__(self, client=None, model=None):
+        self.client = client
+        self.model = model
+        self.api_calls = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def count(self, text):
+        if self.client is not None and self.model:
+            try:
+                total = outbound.call("gemini", self.client.models.count_tokens, model=self.model,
+                                      contents=text).total_tokens
+                with self._lock:
+                    self.api_calls += 1
+                return total
+            except Exception as e:
+                # the estimate errs high, a summary is still possible without the counting API
+                get_metrics().count("token_count_fallbacks_total", model=self.model, reason=type(e).__name__)
+        with self._lock:
+            self.fallbacks += 1
+        return estimate_tokens(text)
+
+
+def cut_to_tokens(text, max_tokens):
+    """Longest prefix of `text` ending on a sentence boundary that fits in max_tokens (estimated)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    used = 0
+    for sentence in _SENTENCE_END.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    # a single sentence (e.g. unpunctuated captions) is too long: cut on words
+    words = text.split(" ")
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(" ".join(words[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo])
+
+
+class ContextBudget:
+    """
+    Fits text into what one request to `model` can take: the model's input
+    limit minus the prompt and a reserve for the output.
+    """
+
+    def __init__(self, model, counter=None, output_reserve=OUTPUT_RESERVE):
+        self.model = model
+        self.counter = counter if counter is not None else TokenCounter()
+        self.output_reserve = output_reserve
+        self.limits = model_limits(model)
+
+    def available(self, prompt):
+        """Tokens left for the transcript after the prompt and output reserve."""
+        # prompts are short, the (over-counting) estimate avoids an API call per request
+        return max(self.limits["input"] - self.output_reserve - estimate_tokens(prompt), 0)
+
+    def fit(self, text, prompt):
+        """
+        Return (text, tokens, truncated). The text is only cut, on a sentence
+        boundary, if it does not fit; the exact count is used when the
+        estimate is close to the limit.
+        """
+        budget = self.available(prompt)
+        estimate = estimate_tokens(text)
+        if estimate <= budget:
+            return text, estimate, False
+        tokens = self.counter.count(text)
+        if tokens <= budget:
+            return text, tokens, False
+        # the estimate over-counts, scale the cut by the real / estimated ratio
+        fitted = cut_to_tokens(text, int(budget * estimate / max(tokens, 1)))
+        return fitted, self.counter.count(fitted), True
+
+    def window_chars(self, text, window_tokens):
+        """How many characters of `text` make roughly `window_tokens` tokens."""
+        sample = text[:20000]
+        chars_per_token = len(sample) / max(estimate_tokens(sample), 1)
+        return max(int(window_tokens * chars_per_token), 1000)
+
+
+class Usage:
+    """Token usage and cost of one summarization request (all its Gemini calls)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.route = None
+        self.calls = 0
+        # duplicate calls sent by hedging; only the call that answered first is in the token totals
+        self.hedges = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def add(self, usage_metadata, hedged=False):
+        if usage_metadata is None:
+            return
+        with self._lock:
+            self.calls += 1
+            self.hedges += int(hedged)
+            self.input_tokens += usage_metadata.prompt_token_count or 0
+            self.output_tokens += (usage_metadata.candidates_token_count or 0) + (
+                getattr(usage_metadata, "thoughts_token_count", None) or 0
+            )
+
+    @property
+    def cost(self):
+        limits = model_limits(self.model)
+        return (self.input_tokens * limits["price_input"] + self.output_tokens * limits["price_output"]) / 1_000_000
+
+    def as_dict(self):
+        return {
+            "model": self.model,
+            "route": self.route,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6),
+            "truncated": self.truncated,
+        }
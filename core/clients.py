@@ -0,0 +1,164 @@
+import os
+import threading
+from collections import Counter
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of long-lived API clients.
+
+    get() builds a client once per key and shares it between all threads;
+    get_per_thread() keeps one instance per thread for clients that are not
+    thread-safe (httplib2 behind the YouTube Data API). Construction counts
+    and the request/connection counters of registered HTTP sessions are
+    reported by stats(), so connection reuse can be checked.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._overrides = {}
+        self._sessions = {}
+        self._local = threading.local()
+        # re-entrant: factories may register their sessions while get() holds the lock
+        self._lock = threading.RLock()
+        self.constructions = Counter()
+
+    def override(self, name, client):
+        """
+        Serve `client` for every key named `name` (e.g. "gemini", "transcript")
+        instead of building the real one; used by the offline benchmarks.
+        Pass None to remove the override.
+        """
+        with self._lock:
+            if client is None:
+                self._overrides.pop(name, None)
+            else:
+                self._overrides[name] = client
+
+    def get(self, key, factory):
+        override = self._overrides.get(key[0] if isinstance(key, tuple) else key)
+        if override is not None:
+            return override
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = factory()
+                    self.constructions[key[0] if isinstance(key, tuple) else key] += 1
+        return client
+
+    def get_per_thread(self, key, factory):
+        override = self._overrides.get(key[0] if isinstance(key, tuple) else key)
+        if override is not None:
+            return override
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = factory()
+            with self._lock:
+                self.constructions[key[0] if isinstance(key, tuple) else key] += 1
+        return client
+
+    def register_session(self, name, session):
+        with self._lock:
+            self._sessions[name] = session
+        return session
+
+    def connection_stats(self):
+        """Requests sent vs connections opened per registered requests.Session."""
+        stats = {}
+        with self._lock:
+            sessions = dict(self._sessions)
+        for name, session in sessions.items():
+            requests_sent = connections = 0
+            for adapter in session.adapters.values():
+                pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+                if pools is None:
+                    continue
+                for pool_key in list(pools.keys()):
+                    pool = pools.get(pool_key)
+                    if pool is not None:
+                        requests_sent += pool.num_requests
+                        connections += pool.num_connections
+            stats[name] = {
+                "requests": requests_sent,
+                "connections": connections,
+                "reused": max(requests_sent - connections, 0),
+            }
+        return stats
+
+    def stats(self):
+        with self._lock:
+            constructions = dict(self.constructions)
+        return {"constructions": constructions, "http": self.connection_stats()}
+
+
+_registry = ClientRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def pooled_session(pool_size=HTTP_POOL_SIZE):
+    """requests.Session with a keep-alive connection pool sized for the worker pools."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ---------- Clients ----------
+
+def gemini_client(api_key=None):
+    """Shared google-genai client; it keeps its own pooled HTTP client alive."""
+    from google import genai
+
+    api_key = api_key or os.getenv("API")
+    return _registry.get(("gemini", api_key), lambda: genai.Client(api_key=api_key))
+
+
+def youtube_data_client(api_key=None):
+    """
+    YouTube Data API service, one per thread because httplib2 is not
+    thread-safe. Uses the discovery document bundled with the library
+    instead of downloading it.
+    """
+    from googleapiclient.discovery import build
+
+    api_key = api_key or os.getenv("YOUTUBE_API_KEY")
+    return _registry.get_per_thread(
+        ("youtube", api_key),
+        lambda: build("youtube", "v3", developerKey=api_key, static_discovery=True, cache_discovery=False),
+    )
+
+
+def transcript_api():
+    """Shared YouTubeTranscriptApi on a pooled keep-alive session."""
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    def factory():
+        session = _registry.register_session("youtube_transcript", pooled_session())
+        return YouTubeTranscriptApi(http_client=session)
+
+    return _registry.get("transcript", factory)
+
+
+def translate_backend():
+    """
+    Shared Google Translate backend. deep_translator calls requests.get
+    directly, so there is no session to pool; the backend still reuses one
+    configured GoogleTranslator per worker thread and language pair.
+    """
+    from core.translation import GoogleTranslateBackend
+
+    return _registry.get("translator", GoogleTranslateBackend)
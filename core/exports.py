@@ -0,0 +1,371 @@
+import functools
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import threading
+import unicodedata
+import zipfile
+from collections import OrderedDict
+
+from core.metrics import get_metrics
+
+# Map format to a correct file extension and MIME type
+FORMATS = {
+    "PDF": {"ext": "pdf", "mime": "application/pdf"},
+    "Word": {"ext": "docx", "mime": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+    "Text": {"ext": "txt", "mime": "text/plain"},
+}
+
+EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "64"))
+# Unicode fonts for PDFs whose text is not Latin-1, looked up in these directories.
+# Drop the Noto Sans files of the scripts you need into fonts/: DejaVu, the usual
+# system font, has no Indic glyphs.
+PDF_FONT_DIRS = [
+    os.getenv("PDF_FONT_DIR", "fonts"),
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/opentype/noto",
+    "/usr/share/fonts/truetype/dejavu",
+]
+# Best first; the first font that exists sets the text, the others fill in the glyphs it lacks
+PDF_FONT_FILES = [
+    "NotoSans-Regular.ttf",
+    "NotoSansDevanagari-Regular.ttf",
+    "NotoSansTamil-Regular.ttf",
+    "NotoSansTelugu-Regular.ttf",
+    "NotoSansBengali-Regular.ttf",
+    "NotoSansKannada-Regular.ttf",
+    "NotoSansMalayalam-Regular.ttf",
+    "NotoSansGujarati-Regular.ttf",
+    "NotoSansGurmukhi-Regular.ttf",
+    "DejaVuSansCondensed.ttf",
+    "DejaVuSans.ttf",
+]
+
+
+class MissingFontError(ValueError):
+    """No installed font has the glyphs of the notes' script, the PDF would come out blank."""
+
+# --- Markdown parsing ---
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_INLINE = re.compile(r"\*\*(.+?)\*\*|\*(?!\s)(.+?)\*|`([^`]+)`")
+
+
+def parse_inline(text):
+    """Split a line into (text, bold, italic) runs for **bold**, *italic* and `code`."""
+    runs = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            runs.append((text[position:match.start()], False, False))
+        bold, italic, code = match.groups()
+        if bold:
+            runs.append((bold, True, False))
+        elif italic:
+            runs.append((italic, False, True))
+        else:
+            runs.append((code, False, False))
+        position = match.end()
+    if position < len(text):
+        runs.append((text[position:], False, False))
+    return runs
+
+
+def parse_markdown(content):
+    """
+    The block structure of the notes Gemini writes: a list of
+    (kind, level, text) with kind "heading", "bullet", "number" or "paragraph".
+    For lists `level` is the nesting depth, for headings the heading level.
+    """
+    blocks = []
+    indents = []  # indentation of the open list levels, 2 and 4 space nesting both work
+
+    def list_level(indent):
+        indent = len(indent.expandtabs(4))
+        while indents and indent < indents[-1]:
+            indents.pop()
+        if not indents or indent > indents[-1]:
+            indents.append(indent)
+        return len(indents) - 1
+
+    for line in (content or "").splitlines():
+        if not line.strip() or _RULE.match(line):
+            continue
+        match = _HEADING.match(line.strip())
+        if match:
+            indents.clear()
+            blocks.append(("heading", len(match.group(1)), match.group(2).strip().strip("#").strip()))
+            continue
+        match = _BULLET.match(line)
+        if match:
+            blocks.append(("bullet", list_level(match.group(1)), match.group(2).strip()))
+            continue
+        match = _NUMBERED.match(line)
+        if match:
+            blocks.append(("number", list_level(match.group(1)), f"{match.group(2)}. {match.group(3).strip()}"))
+            continue
+        indents.clear()
+        blocks.append(("paragraph", 0, line.strip()))
+    return blocks
+
+
+def plain_text(text):
+    return "".join(run for run, _, _ in parse_inline(text))
+
+
+# --- Renderers ---
+
+def _render_word(blocks):
+    from docx import Document
+
+    doc = Document()
+    for kind, level, text in blocks:
+        if kind == "heading":
+            doc.add_heading(plain_text(text), level=min(level, 9))
+            continue
+        if kind == "bullet":
+            # the default template has "List Bullet", "List Bullet 2" and "List Bullet 3"
+            paragraph = doc.add_paragraph(style="List Bullet" + (f" {min(level, 2) + 1}" if level else ""))
+        elif kind == "number":
+            # Gemini numbers its own lists, keep its numbers instead of Word's auto numbering
+            paragraph = doc.add_paragraph(style="List Continue" + (f" {min(level, 2) + 1}" if level else ""))
+        else:
+            paragraph = doc.add_paragraph()
+        for run_text, bold, italic in parse_inline(text):
+            run = paragraph.add_run(run_text)
+            run.bold = bold or None
+            run.italic = italic or None
+
+    # Save the document to a BytesIO object
+    doc_stream = io.BytesIO()
+    doc.save(doc_stream)
+    return doc_stream.getvalue()
+
+
+@functools.lru_cache(maxsize=1)
+def _unicode_fonts():
+    """(path, code points) of the installed PDF fonts, in PDF_FONT_FILES order."""
+    from fontTools.ttLib import TTFont
+
+    fonts = []
+    for name in PDF_FONT_FILES:
+        for directory in PDF_FONT_DIRS:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                fonts.append((path, frozenset(TTFont(path, lazy=True).getBestCmap())))
+                break
+    return fonts
+
+
+def _is_latin1(text):
+    try:
+        text.encode("latin-1")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def pdf_missing_glyphs(content):
+    """
+    The letters of `content` no installed font can show, as a sorted string;
+    empty when the notes can be exported as PDF. Symbols without a glyph
+    (emoji and the like) are left out of the PDF and do not count.
+    """
+    if _is_latin1(content or ""):
+        return ""
+    covered = set().union(*(codepoints for _, codepoints in _unicode_fonts()))
+    return "".join(sorted({
+        char for char in content
+        if ord(char) > 0xFF and ord(char) not in covered and unicodedata.category(char)[0] in "LM"
+    }))
+
+
+def _pdf_font(pdf, text):
+    """
+    Pick the PDF font: the built-in Helvetica when the text is Latin-1 (no font
+    file to parse or embed, the fast path), otherwise the Unicode TTFs that
+    cover the text, the first one as the main font and the others as
+    fallbacks. Returns (family, supports bold/italic, bullet character).
+    """
+    if _is_latin1(text):
+        return "Helvetica", True, "-"
+    missing = pdf_missing_glyphs(text)
+    if missing:
+        raise MissingFontError(
+            f"No PDF font for {missing[:10]!r}, add a Noto Sans font for this script to {PDF_FONT_DIRS[0]}/"
+        )
+    chars = {ord(char) for char in text if ord(char) > 0xFF}
+    families, bullet = [], "-"
+    for n, (path, codepoints) in enumerate(_unicode_fonts()):
+        if chars & codepoints:
+            if not families and ord("•") in codepoints:
+                bullet = "•"
+            families.append(f"Unicode{n}")
+            pdf.add_font(families[-1], "", path)
+            chars -= codepoints
+    if not families:
+        # only symbols no font has, they are left out
+        return "Helvetica", True, "-"
+    pdf.set_fallback_fonts(families[1:])
+    if importlib.util.find_spec("uharfbuzz"):
+        # Indic scripts need shaping to join their conjuncts and vowel signs
+        pdf.set_text_shaping(True)
+    return families[0], False, bullet
+
+
+def _render_pdf(blocks):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    family, styled, bullet = _pdf_font(pdf, "".join(text for _, _, text in blocks))
+
+    for kind, level, text in blocks:
+        if kind == "heading":
+            pdf.set_font(family, "B" if styled else "", max(18 - 2 * level, 11))
+            pdf.multi_cell(0, 8, plain_text(text), new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(2)
+            continue
+        indent = 0
+        if kind in ("bullet", "number"):
+            indent = 6 * (level + 1)
+        pdf.set_left_margin(pdf.l_margin + indent)
+        pdf.set_x(pdf.l_margin)
+        if kind == "bullet":
+            pdf.set_font(family, "", 11)
+            pdf.write(6, f"{bullet} ")
+        for run_text, bold, italic in parse_inline(text):
+            style = ("B" if bold else "") + ("I" if italic else "") if styled else ""
+            pdf.set_font(family, style, 11)
+            pdf.write(6, run_text)
+        pdf.ln(7)
+        pdf.set_left_margin(pdf.l_margin - indent)
+    return bytes(pdf.output())
+
+
+def _render_text(blocks):
+    lines = []
+    for kind, level, text in blocks:
+        if kind == "heading":
+            if lines:
+                lines.append("")
+            lines.append(plain_text(text))
+        elif kind == "bullet":
+            lines.append("  " * level + "- " + plain_text(text))
+        elif kind == "number":
+            lines.append("  " * level + plain_text(text))
+        else:
+            lines.append(plain_text(text))
+    return "\n".join(lines).encode("utf-8")
+
+
+_RENDERERS = {"PDF": _render_pdf, "Word": _render_word, "Text": _render_text}
+
+
+def get_download_data(format, content):
+    """Render notes into the bytes of a downloadable file in the given format."""
+    renderer = _RENDERERS.get(format)
+    if renderer is None:
+        return b""  # Return empty bytes if format is not recognized
+    return renderer(parse_markdown(content))
+
+
+# --- Memoized exports ---
+
+class ExportCache:
+    """Thread-safe LRU of rendered exports keyed by (content hash, format), bounded by total size."""
+
+    def __init__(self, max_bytes=EXPORT_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(format, content):
+        return hashlib.sha256((content or "").encode("utf-8")).hexdigest(), format
+
+    def get_or_render(self, format, content):
+        """The export bytes, rendered only if this exact content and format were not seen recently."""
+        key = self.key(format, content)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if data is not None:
+            get_metrics().cache("export", hits=1)
+            return data
+        get_metrics().cache("export", misses=1)
+
+        # rendered outside the lock; two sessions racing on the same key just render twice
+        with get_metrics().span("export", format=format) as span:
+            span["bytes_in"] = len((content or "").encode("utf-8"))
+            data = get_download_data(format, content)
+            span["bytes_out"] = len(data)
+        with self._lock:
+            self.misses += 1
+            if len(data) <= self.max_bytes and key not in self._entries:
+                self._entries[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self.size -= len(old)
+        return data
+
+
+_export_cache = ExportCache()
+
+
+def get_export(format, content):
+    """Process-wide memoized get_download_data."""
+    return _export_cache.get_or_render(format, content)
+
+
+# --- Bulk ZIP export ---
+
+def write_zip(documents, fileobj, format="Word"):
+    """
+    Write (name, notes) pairs into a ZIP on `fileobj`, one document at a time:
+    each export is rendered, compressed into the archive and dropped before
+    the next one, so only one rendered document is held at a time. Notes
+    no PDF font can show are written as text instead. Returns the number of
+    documents written.
+    """
+    written = 0
+    seen = set()
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in documents:
+            name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "notes"
+            unique, n = name, 1
+            while unique in seen:
+                n += 1
+                unique = f"{name}_{n}"
+            seen.add(unique)
+            try:
+                data, ext = get_download_data(format, content), FORMATS[format]["ext"]
+            except MissingFontError:
+                data, ext = get_download_data("Text", content), FORMATS["Text"]["ext"]
+            with archive.open(f"{unique}.{ext}", "w") as entry:
+                entry.write(data)
+            written += 1
+    return written
+
+
+def build_zip(documents, format="Word"):
+    """
+    The bytes of write_zip, for st.download_button: Streamlit holds the whole
+    download in memory anyway, write_zip only keeps the documents from
+    piling up while it is built.
+    """
+    fileobj = io.BytesIO()
+    write_zip(documents, fileobj, format)
+    return fileobj.getvalue()
@@ -0,0 +1,341 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from core.search import SearchIndex
+from core.sqlite_store import SQLiteStore
+
+DEFAULT_HISTORY_PATH = os.getenv("HISTORY_DB_PATH", os.path.join("data", "history.sqlite3"))
+LEGACY_JSON_PATH = "user_data.json"
+FLUSH_INTERVAL = 0.5  # seconds between write-behind flushes
+FLUSH_BATCH = 100
+FLUSH_ATTEMPTS = 20  # a batch failing this often is given up, e.g. a row the table rejects
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(text):
+    return zlib.compress((text or "").encode("utf-8"), 6)
+
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else ""
+
+
+def _parse_timestamp(value):
+    """Best effort conversion of a legacy timestamp string to epoch seconds."""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class HistoryStore(SQLiteStore):
+    """
+    Per-user history of generated notes.
+
+    SQLite in WAL mode with indexes on (username, created_at) and created_at,
+    so a page of one user's history costs the same however many users and
+    notes are stored. Summary bodies are zlib-compressed and only loaded by
+    get_summary(). Inserts are queued and written in batches by a background
+    thread (write-behind); reads flush the queue first so they see them.
+    With a SearchIndex, every written batch is indexed right after it.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, flush_interval=FLUSH_INTERVAL, index=None):
+        super().__init__(path)
+        self.flush_interval = flush_interval
+        self.index = index
+        self._pending = queue.Queue()
+        self._flush_lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password_hash TEXT
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL,
+                    youtube_link TEXT NOT NULL,
+                    video_id TEXT,
+                    timestamp TEXT,
+                    created_at REAL NOT NULL,
+                    summary BLOB,
+                    summary_size INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user_time ON history (username, created_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_history_time ON history (created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._writer = threading.Thread(target=self._write_behind, name="history-writer", daemon=True)
+        self._writer.start()
+        # the writer is a daemon thread, whatever is still queued at exit is written here
+        atexit.register(self._flush_at_exit)
+
+    # ---------- Writes ----------
+
+    def add(self, username, youtube_link, summary, video_id=None, created_at=None, transcript=None):
+        """
+        Queue a history item; it is written with the next batch. The transcript
+        is not stored, only indexed for search.
+        """
+        created_at = created_at if created_at is not None else time.time()
+        row = (
+            username,
+            youtube_link,
+            video_id,
+            datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S"),
+            created_at,
+            _compress(summary),
+            len(summary or ""),
+        )
+        self._pending.put((row, (summary or "", transcript or "") if self.index is not None else None, 0))
+
+    def flush(self):
+        """
+        Write every queued item now, in batches of FLUSH_BATCH rows per
+        transaction. A batch that fails is queued again for the next flush
+        and the error raised.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                items = []
+                while len(items) < FLUSH_BATCH:
+                    try:
+                        items.append(self._pending.get_nowait())
+                    except queue.Empty:
+                        break
+                if not items:
+                    return written
+                try:
+                    with self._transaction() as conn:
+                        ids = [
+                            conn.execute(
+                                "INSERT INTO history (username, youtube_link, video_id, timestamp, created_at, summary, summary_size) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                row,
+                            ).lastrowid
+                            for row, _, _ in items
+                        ]
+                except Exception:
+                    self._requeue(items)
+                    raise
+                if self.index is not None:
+                    try:
+                        self.index.add_many(
+                            (item_id, row[0], *texts)
+                            for item_id, (row, texts, _) in zip(ids, items) if texts is not None
+                        )
+                    except Exception:
+                        # the history itself is saved; index_missing() picks these up on the next start
+                        logger.exception("Indexing %d history items failed", len(items))
+                written += len(items)
+
+    def _requeue(self, items):
+        for row, texts, attempts in items:
+            if attempts + 1 < FLUSH_ATTEMPTS:
+                self._pending.put((row, texts, attempts + 1))
+            else:
+                logger.error("Giving up on the history item of %r for %s after %d failed writes",
+                             row[0], row[1], FLUSH_ATTEMPTS)
+
+    def _write_behind(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                # the batch is queued again, the writer must stay alive to retry it
+                logger.exception("Writing the history failed, %d items queued for retry", self._pending.qsize())
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Writing the history at exit failed, %d items lost", self._pending.qsize())
+
+    # ---------- Reads ----------
+
+    def count(self, username):
+        self.flush()
+        return self._connect().execute("SELECT COUNT(*) FROM history WHERE username = ?", (username,)).fetchone()[0]
+
+    def list_history(self, username, offset=0, limit=20, include_summary=False):
+        """One page of a user's history, newest first. Bodies only if include_summary."""
+        self.flush()
+        columns = "id, youtube_link, video_id, timestamp, created_at, summary_size"
+        if include_summary:
+            columns += ", summary"
+        rows = self._connect().execute(
+            f"SELECT {columns} FROM history WHERE username = ? "
+            f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (username, limit, offset),
+        ).fetchall()
+        items = []
+        for row in rows:
+            item = {
+                "id": row[0],
+                "youtube_link": row[1],
+                "video_id": row[2],
+                "timestamp": row[3],
+                "created_at": row[4],
+                "summary_size": row[5],
+            }
+            if include_summary:
+                item["summary"] = _decompress(row[6])
+            items.append(item)
+        return items
+
+    def iter_history(self, username, batch=50):
+        """
+        Every history item of a user with its summary, oldest first. Rows are
+        read `batch` at a time (keyset paging on the user/time index), so only
+        one batch of summaries is in memory however long the history is.
+        """
+        self.flush()
+        last = (-1.0, -1)
+        while True:
+            rows = self._connect().execute(
+                "SELECT id, youtube_link, video_id, timestamp, created_at, summary FROM history "
+                "WHERE username = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?",
+                (username, last[0], last[1], batch),
+            ).fetchall()
+            for row in rows:
+                yield {
+                    "id": row[0],
+                    "youtube_link": row[1],
+                    "video_id": row[2],
+                    "timestamp": row[3],
+                    "created_at": row[4],
+                    "summary": _decompress(row[5]),
+                }
+            if len(rows) < batch:
+                return
+            last = (rows[-1][4], rows[-1][0])
+
+    def list_between(self, start, end, limit=100):
+        """History of all users created in [start, end), oldest first."""
+        self.flush()
+        rows = self._connect().execute(
+            "SELECT id, username, youtube_link, timestamp, created_at FROM history "
+            "WHERE created_at >= ? AND created_at < ? ORDER BY created_at LIMIT ?",
+            (start, end, limit),
+        ).fetchall()
+        return [
+            {"id": r[0], "username": r[1], "youtube_link": r[2], "timestamp": r[3], "created_at": r[4]}
+            for r in rows
+        ]
+
+    def search(self, username, query, limit=20):
+        """The user's history items best matching `query`, best first, each with its "score"."""
+        if self.index is None:
+            return []
+        self.flush()
+        ranked = self.index.search(username, query, limit)
+        if not ranked:
+            return []
+        ids = [item_id for item_id, _ in ranked]
+        rows = self._connect().execute(
+            f"SELECT id, youtube_link, video_id, timestamp, created_at, summary_size FROM history "
+            f"WHERE username = ? AND id IN ({','.join('?' * len(ids))})",
+            (username, *ids),
+        ).fetchall()
+        by_id = {
+            row[0]: {
+                "id": row[0],
+                "youtube_link": row[1],
+                "video_id": row[2],
+                "timestamp": row[3],
+                "created_at": row[4],
+                "summary_size": row[5],
+            }
+            for row in rows
+        }
+        return [{**by_id[item_id], "score": score} for item_id, score in ranked if item_id in by_id]
+
+    def index_missing(self, batch=200):
+        """
+        Index history written before the search index existed (or lost by a
+        crash between a write and its indexing). Only summaries are available
+        for those, transcripts are not stored. Returns the number indexed.
+        """
+        if self.index is None:
+            return 0
+        self.flush()
+        indexed = self.index.indexed_ids()
+        conn = self._connect()
+        missing = [row[0] for row in conn.execute("SELECT id FROM history ORDER BY id") if row[0] not in indexed]
+        for start in range(0, len(missing), batch):
+            ids = missing[start:start + batch]
+            rows = conn.execute(
+                f"SELECT id, username, summary FROM history WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+            self.index.add_many((item_id, username, _decompress(summary), "") for item_id, username, summary in rows)
+        return len(missing)
+
+    def get_summary(self, item_id):
+        row = self._connect().execute("SELECT summary FROM history WHERE id = ?", (item_id,)).fetchone()
+        return _decompress(row[0]) if row else None
+
+    # ---------- Legacy JSON migration ----------
+
+    def migrate_from_json(self, json_path=LEGACY_JSON_PATH):
+        """
+        One-shot import of the legacy user_data.json
+        ({username: {"password": ..., "history": [...]}}). Runs once per
+        database; the JSON file itself is left untouched.
+        """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return 0
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r") as f:
+            user_data = json.load(f)
+
+        migrated = 0
+        with self._transaction(conn):
+            for username, data in user_data.items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO users VALUES (?, ?)", (username, data.get("password"))
+                )
+                for position, item in enumerate(data.get("history", [])):
+                    # items without a parsable timestamp keep their relative order
+                    created_at = _parse_timestamp(item.get("timestamp")) or float(position)
+                    summary = item.get("summary", "")
+                    conn.execute(
+                        "INSERT INTO history (username, youtube_link, video_id, timestamp, created_at, summary, summary_size) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (username, item.get("youtube_link", ""), None, item.get("timestamp", "N/A"),
+                         created_at, _compress(summary), len(summary)),
+                    )
+                    migrated += 1
+            conn.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (str(time.time()),))
+        return migrated
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Process-wide history store with its search index, migrated from user_data.json on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(index=SearchIndex())
+            _store.migrate_from_json()
+            _store.index_missing()
+        return _store
@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core import youtube
+from core.metrics import get_metrics
+from core.pipeline import generate_notes, prepare_transcript
+from core.summarize import DEFAULT_PROMPT
+
+COLLECTION_MAX_VIDEOS = int(os.getenv("COLLECTION_MAX_VIDEOS", "50"))
+# Transcript fetches run ahead of the summaries, which wait on Gemini
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+COLLECTION_WORKERS = int(os.getenv("COLLECTION_WORKERS", "8"))
+
+
+def expand_urls(urls, youtube_api_key=None, limit=COLLECTION_MAX_VIDEOS):
+    """
+    Replace playlist and channel URLs by the watch URLs of their videos
+    (at most `limit` per collection) and drop duplicates. With an API key the
+    metadata of every video is fetched in batched requests as well.
+    Returns (urls, details); details is None without a key.
+    """
+    expanded = []
+    for url in urls:
+        if youtube.extract_video_id(url) or not youtube.extract_collection(url):
+            expanded.append(url)
+        else:
+            expanded.extend(map(youtube.watch_url, youtube.list_collection(url, youtube_api_key, limit)))
+    expanded = list(dict.fromkeys(expanded))
+    if not youtube_api_key:
+        return expanded, None
+    video_ids = [video_id for video_id in map(youtube.extract_video_id, expanded) if video_id]
+    return expanded, youtube.fetch_videos_details(video_ids, youtube_api_key)
+
+
+def _summarize(video_id, fetched, summarizer, prompt, details):
+    started = time.monotonic()
+    url = youtube.watch_url(video_id)
+    result = {
+        "video_id": video_id,
+        "url": url,
+        "title": details.get(video_id, {}).get("title") or video_id,
+        "status": "ok",
+        "error": None,
+    }
+    try:
+        notes = generate_notes(url, summarizer, prompt, fetched=fetched)
+        result.update(summary=notes["summary"], transcript=notes["transcript"], usage=notes["usage"])
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def summarize_collection(url, summarizer, prompt=DEFAULT_PROMPT, youtube_api_key=None, transcript_cache=None,
+                         limit=COLLECTION_MAX_VIDEOS, workers=COLLECTION_WORKERS, fetch_workers=FETCH_WORKERS,
+                         on_result=None):
+    """
+    Notes for every video of a playlist or channel URL. The video ids are
+    paged 50 at a time, their metadata comes from batched videos.list calls,
+    all transcripts are fetched and normalized concurrently and each video
+    is summarized as soon as its transcript is in. on_result(done, total,
+    result) is called as videos finish; one failed video does not stop the
+    others. Returns the results in playlist order.
+    """
+    with get_metrics().span("collection_list") as span:
+        video_ids = youtube.list_collection(url, youtube_api_key, limit)
+        span["videos"] = len(video_ids)
+    if not video_ids:
+        raise ValueError("No videos found for this playlist or channel link.")
+    with get_metrics().span("collection_details", videos=len(video_ids)):
+        details = youtube.fetch_videos_details(video_ids, youtube_api_key)
+
+    results = {}
+    with ThreadPoolExecutor(fetch_workers, thread_name_prefix="transcript-fetch") as fetch_pool, \
+            ThreadPoolExecutor(workers, thread_name_prefix="collection") as pool:
+        fetches = {
+            fetch_pool.submit(prepare_transcript, video_id, youtube_api_key, transcript_cache, details): video_id
+            for video_id in video_ids
+        }
+        pending = set(fetches)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetches:
+                    pending.add(pool.submit(_summarize, fetches[future], future, summarizer, prompt, details))
+                    continue
+                result = future.result()
+                results[result["video_id"]] = result
+                if on_result:
+                    on_result(len(results), len(video_ids), result)
+    return [results[video_id] for video_id in video_ids]
@@ -0,0 +1,131 @@
+import itertools
+import os
+import queue
+import threading
+import time
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+JOB_RESULT_TTL = 15 * 60  # seconds a finished job stays available for polling
+
+
+class SchedulerBusy(Exception):
+    """Raised by JobScheduler.submit when the queue is full."""
+
+
+class Job:
+    """Handle to a background job. Poll `status`, or wait() for it."""
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+    def __init__(self, job_id, key):
+        self.id = job_id
+        self.key = key
+        self.status = Job.QUEUED
+        self.result = None
+        self.error = None
+        self.partial = ""
+        self.progress = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def append_partial(self, text):
+        """Let the job function publish partial output (e.g. streamed notes) to pollers."""
+        self.partial += text
+
+    def set_progress(self, done, total, restored=0):
+        """Let the job function publish step progress, e.g. finished summary chunks."""
+        self.progress = {"done": done, "total": total, "restored": restored}
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class JobScheduler:
+    """
+    Process-wide background job runner with single-flight de-duplication.
+
+    Jobs are run by `max_workers` threads from a queue holding at most
+    `max_queue` waiting jobs; submit() raises SchedulerBusy beyond that
+    (backpressure). Submitting a key that is already queued or running
+    returns the existing job instead of starting a second one.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_queue=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Run func(job, *args, **kwargs) in the background and return its Job.
+        The function's return value becomes job.result.
+        """
+        with self._lock:
+            self._expire()
+            job = self._in_flight.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                return job
+            job = Job(f"job-{next(self._ids)}", key)
+            try:
+                self._queue.put_nowait((job, func, args, kwargs))
+            except queue.Full:
+                self.rejected += 1
+                raise SchedulerBusy("Too many jobs are waiting, try again shortly.")
+            self._in_flight[key] = job
+            self._jobs[job.id] = job
+            self.submitted += 1
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+            }
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            job, func, args, kwargs = self._queue.get()
+            job.status = Job.RUNNING
+            try:
+                job._finish(Job.DONE, result=func(job, *args, **kwargs))
+            except Exception as e:
+                job._finish(Job.FAILED, error=f"{e}")
+            finally:
+                with self._lock:
+                    if self._in_flight.get(job.key) is job:
+                        del self._in_flight[job.key]
+                self._queue.task_done()
@@ -0,0 +1,203 @@
+import bisect
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Recent durations kept per stage for the percentiles on the admin page
+WINDOW = 2048
+RECENT_SPANS = 200
+PREFIX = "ytnotes"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """
+    In-process metrics for the pipeline stages: duration histograms, error,
+    payload and cache counters, plus a window of recent durations per stage
+    for p50/p95/p99. Thread-safe; spans are recorded from background jobs
+    and worker pools as well as from page runs.
+    """
+
+    def __init__(self, window=WINDOW, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._window = window
+        self._lock = threading.Lock()
+        self._histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+        self._durations = {}   # stage -> deque of recent seconds
+        self._counters = Counter()  # (metric name, ((label, value), ...)) -> value
+        self._recent = deque(maxlen=RECENT_SPANS)
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """
+        Time the block as one run of `stage`. Yields a dict the caller may add
+        attributes to; "bytes_in" / "bytes_out" are counted as payload sizes.
+        Exceptions are counted by type and re-raised.
+        """
+        record = dict(attrs)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, error, record)
+
+    def observe(self, stage, seconds, error=None, record=None):
+        record = record or {}
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [0] * (len(self.buckets) + 2)
+                self._durations[stage] = deque(maxlen=self._window)
+            histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[-1] += seconds
+            self._durations[stage].append(seconds)
+            self._counters[("stage_runs_total", (("stage", stage),))] += 1
+            if error:
+                self._counters[("stage_errors_total", (("stage", stage), ("error", error)))] += 1
+            for direction in ("in", "out"):
+                size = record.get(f"bytes_{direction}")
+                if size:
+                    self._counters[("payload_bytes_total", (("stage", stage), ("direction", direction)))] += size
+            self._recent.append({"stage": stage, "at": time.time(), "seconds": seconds, "error": error, **record})
+
+    def count(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def cache(self, cache, hits=0, misses=0):
+        """Count lookups of a named cache ("summary", "transcript", ...)."""
+        with self._lock:
+            if hits:
+                self._counters[("cache_requests_total", (("cache", cache), ("result", "hit")))] += hits
+            if misses:
+                self._counters[("cache_requests_total", (("cache", cache), ("result", "miss")))] += misses
+
+    def stage_summary(self):
+        """Per stage: runs, errors, mean and p50/p95/p99 seconds over the recent window."""
+        with self._lock:
+            durations = {stage: sorted(values) for stage, values in self._durations.items()}
+            counters = dict(self._counters)
+        summary = {}
+        for stage, values in sorted(durations.items()):
+            errors = sum(
+                value for (name, labels), value in counters.items()
+                if name == "stage_errors_total" and labels[0] == ("stage", stage)
+            )
+            summary[stage] = {
+                "runs": counters.get(("stage_runs_total", (("stage", stage),)), 0),
+                "errors": errors,
+                "mean": sum(values) / len(values) if values else None,
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            }
+        return summary
+
+    def cache_summary(self):
+        """Per cache: hits, misses and hit rate since the process started."""
+        with self._lock:
+            counters = dict(self._counters)
+        caches = {}
+        for (name, labels), value in counters.items():
+            if name == "cache_requests_total":
+                labels = dict(labels)
+                caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += value
+        return {
+            cache: {"hits": c["hit"], "misses": c["miss"], "hit_rate": c["hit"] / (c["hit"] + c["miss"])}
+            for cache, c in sorted(caches.items())
+        }
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def render_prometheus(self):
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = {stage: list(values) for stage, values in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines += [f"# HELP {name} Time spent in each pipeline stage.", f"# TYPE {name} histogram"]
+        for stage, values in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels((('stage', stage), ('le', bound)))} {cumulative}")
+            cumulative += values[len(self.buckets)]
+            lines.append(f"{name}_bucket{_labels((('stage', stage), ('le', '+Inf')))} {cumulative}")
+            lines.append(f"{name}_sum{_labels((('stage', stage),))} {values[-1]:.6f}")
+            lines.append(f"{name}_count{_labels((('stage', stage),))} {cumulative}")
+
+        by_name = {}
+        for (metric, labels), value in counters.items():
+            by_name.setdefault(metric, []).append((labels, value))
+        for metric, samples in sorted(by_name.items()):
+            full_name = f"{PREFIX}_{metric}"
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in sorted(samples):
+                lines.append(f"{full_name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._durations.clear()
+            self._counters.clear()
+            self._recent.clear()
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """The process-wide metrics every stage reports into."""
+    return _metrics
+
+
+def serve_metrics(port, host="0.0.0.0", metrics=None):
+    """
+    Serve GET /metrics for a Prometheus scraper on a daemon thread. Returns
+    the server, so a caller can shut it down.
+    """
+    metrics = metrics or get_metrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes every few seconds would flood the Streamlit log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,131 @@
+import re
+import time
+
+from core.budget import estimate_tokens
+
+# A letter of any script; Indic vowel signs and viramas are not \w
+_LETTER = r"(?:[^\W\d_]|[\u0300-\u036f\u0900-\u0dff])"
+# Caption annotations such as [Music], [Applause], (laughter), ♪ lyrics ♪: a bracketed tag is
+# 1-4 words of letters only and not attached to a word, so "array[i]" or "[1]" stay
+_ANNOTATION = re.compile(
+    rf"(?<![\w\]])\[\s*{_LETTER}+(?:[ -]{_LETTER}+){{0,3}}\s*\]"
+    r"|\((?:music|applause|laughter|laughs|inaudible|silence|cheering)\)|[♪♫]+",
+    re.IGNORECASE,
+)
+# the same 1-3 words said three or more times in a row: "the the the", "you know you know you know".
+# Two in a row is normal speech ("had had", "New York New York") and numbers are never collapsed.
+_REPEAT = re.compile(r"(?<!\S)((?!\S*\d)\S+(?:\s+(?!\S*\d)\S+){0,2}?)(?:\s+\1){2,}(?!\S)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+# Filler words per language code; anything unlisted uses "default".
+LANGUAGE_RULES = {
+    "default": {"fillers": []},
+    "en": {"fillers": ["um", "umm", "uh", "uhh", "uh-huh", "erm", "er", "hmm", "mm", "mhm"]},
+    "hi": {"fillers": ["um", "uh", "हम्म", "अं", "अम्म"]},
+    "ta": {"fillers": ["um", "uh", "ம்ம்"]},
+    "te": {"fillers": ["um", "uh", "అ"]},
+}
+MERGE_WINDOW = 20  # words compared when removing rolling-caption overlap
+
+
+def _filler_pattern(fillers):
+    if not fillers:
+        return None
+    alternatives = "|".join(re.escape(word) for word in sorted(fillers, key=len, reverse=True))
+    return re.compile(rf"(?<!\S)(?:{alternatives})[,.]?(?!\S)", re.IGNORECASE)
+
+
+class NormalizationReport:
+    def __init__(self):
+        self.segments = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "segments": self.segments,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "chars_removed": self.chars_in - self.chars_out,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_removed": self.tokens_in - self.tokens_out,
+            "seconds": round(self.seconds, 4),
+        }
+
+
+class TranscriptNormalizer:
+    """
+    Cleans auto-generated captions before they reach the LLM: strips
+    annotations like [Music], drops per-language filler words, collapses
+    stuttered repeats and removes the overlap that rolling captions
+    repeat from the previous line. Works one segment at a time, so it can
+    run on a stream of segments.
+    """
+
+    def __init__(self, language=None, fillers=None, extra_patterns=()):
+        base = (language or "default").split("-")[0].lower()
+        rules = LANGUAGE_RULES.get(base, LANGUAGE_RULES["default"])
+        self.language = base
+        self._fillers = _filler_pattern(fillers if fillers is not None else rules["fillers"])
+        self._extra = [re.compile(pattern, re.IGNORECASE) for pattern in extra_patterns]
+
+    def clean(self, text):
+        """Normalize one caption line on its own."""
+        text = _ANNOTATION.sub(" ", text)
+        for pattern in self._extra:
+            text = pattern.sub(" ", text)
+        if self._fillers is not None:
+            text = self._fillers.sub(" ", text)
+        text = _SPACES.sub(" ", text).strip()
+        return _REPEAT.sub(r"\1", text)
+
+    def stream(self, texts, report=None):
+        """Yield normalized segment texts for an iterable of raw segment texts."""
+        previous = []
+        for raw in texts:
+            text = self.clean(raw)
+            if report is not None:
+                report.segments += 1
+                report.chars_in += len(raw) + 1
+            words = text.split(" ") if text else []
+            overlap = _overlap(previous, words)
+            if overlap:
+                words = words[overlap:]
+            if not words:
+                continue
+            previous = (previous + words)[-MERGE_WINDOW:]
+            text = " ".join(words)
+            if report is not None:
+                report.chars_out += len(text) + 1
+            yield text
+
+    def normalize(self, texts):
+        """Normalize segment texts into one string. Returns (text, report)."""
+        started = time.perf_counter()
+        report = NormalizationReport()
+        texts = list(texts)
+        text = " ".join(self.stream(texts, report))
+        # repeats can also span segment boundaries
+        text = _REPEAT.sub(r"\1", text)
+        # input and output are measured the same way, as one joined string each,
+        # so an already clean transcript reports nothing removed
+        raw = " ".join(texts)
+        report.chars_in, report.chars_out = len(raw), len(text)
+        report.tokens_in, report.tokens_out = estimate_tokens(raw), estimate_tokens(text)
+        report.seconds = time.perf_counter() - started
+        return text, report
+
+
+def _overlap(previous, words):
+    """Length of the longest suffix of `previous` that is a prefix of `words`."""
+    longest = min(len(previous), len(words), MERGE_WINDOW)
+    for size in range(longest, 0, -1):
+        if previous[-size:] == words[:size]:
+            # a single repeated word is more often speech than a caption artefact
+            if size > 1 or size == len(words):
+                return size
+    return 0
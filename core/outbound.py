@@ -0,0 +1,264 @@
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from core.metrics import get_metrics
+from core.rate_limit import TokenBucket
+
+# HTTP statuses worth retrying: timeouts, throttling and transient server errors
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429})
+# Exceptions of the client libraries that mean "try again later" but carry no status
+_TRANSIENT_NAMES = frozenset({
+    "ConnectionError", "ConnectTimeout", "ReadTimeout", "Timeout", "ChunkedEncodingError",  # requests
+    "ServerNotFoundError", "RemoteDisconnected", "IncompleteRead",  # httplib2 / http.client
+    "TooManyRequests", "RequestError",  # deep_translator
+    "RequestBlocked", "IpBlocked",  # youtube_transcript_api
+})
+_THROTTLE_NAMES = frozenset({"TooManyRequests", "RequestBlocked", "IpBlocked"})
+
+# Per-service defaults: (requests per second, burst, attempts, first backoff seconds, max backoff seconds)
+SERVICE_DEFAULTS = {
+    "gemini": (5.0, 10, 4, 1.0, 30.0),
+    "youtube": (10.0, 10, 3, 0.5, 8.0),
+    "transcript": (5.0, 5, 3, 1.0, 10.0),
+    "translate": (10.0, 10, 4, 0.5, 10.0),
+    "tts": (5.0, 5, 3, 0.5, 8.0),
+}
+BREAKER_FAILURES = int(os.getenv("OUTBOUND_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("OUTBOUND_BREAKER_RESET", "30"))
+
+
+class CircuitOpen(Exception):
+    """Raised without calling the service while its circuit breaker is open."""
+
+
+def _status(exc):
+    """HTTP status carried by an exception of requests, google-genai, googleapiclient or gTTS, if any."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    for attr in ("response", "resp", "rsp"):
+        response = getattr(exc, attr, None)
+        if response is None:
+            continue
+        value = getattr(response, "status_code", None) or getattr(response, "status", None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _retry_after(exc):
+    for attr in ("response", "resp", "rsp"):
+        headers = getattr(getattr(exc, attr, None), "headers", None)
+        if headers:
+            try:
+                return float(headers.get("Retry-After") or headers.get("retry-after"))
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def classify(exc):
+    """"throttled", "transient" or None (not worth retrying, e.g. a 400 or a missing transcript)."""
+    status = _status(exc)
+    if status is not None:
+        if status in THROTTLE_STATUSES:
+            return "throttled"
+        return "transient" if status in RETRY_STATUSES else None
+    name = type(exc).__name__
+    if name in _THROTTLE_NAMES:
+        return "throttled"
+    if name in _TRANSIENT_NAMES or isinstance(exc, (ConnectionError, TimeoutError)):
+        return "transient"
+    return None
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive calls failed transiently and then
+    fails fast for `reset_seconds`. After that one probe call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+            if self.state == CircuitBreaker.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = CircuitBreaker.HALF_OPEN
+                self._probing = False
+            if self.state == CircuitBreaker.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class Service:
+    """
+    One outbound backend: a token bucket shared by every caller in the process,
+    retries with jittered exponential backoff for throttling and transient
+    errors, and a circuit breaker. Other errors are raised at once.
+    """
+
+    def __init__(self, name, rate, burst, max_attempts, base_delay, max_delay, breaker=None):
+        self.name = name
+        self.limiter = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counters[outcome] += 1
+        get_metrics().count("outbound_total", service=self.name, outcome=outcome)
+
+    def _waited(self, reason, seconds):
+        """Time spent not calling the service: waiting for the rate limit or backing off."""
+        with self._lock:
+            self.counters[f"{reason}_seconds"] += seconds
+        get_metrics().count("outbound_wait_seconds_total", seconds, service=self.name, reason=reason)
+
+    def backoff(self, attempt, retry_after=None):
+        """Full jitter: a random delay up to base * 2^(attempt - 1), capped, or the server's Retry-After."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func, *args, **kwargs):
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen(f"{self.name} is temporarily unavailable (too many failures), please try again shortly")
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.monotonic()
+            self.limiter.acquire()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self._count("rate_limited")
+                self._waited("rate_limit", waited)
+            self._count("attempts")
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                if kind is None:
+                    # the service answered, it just refused this request
+                    self.breaker.record_success()
+                    self._count("errors")
+                    raise
+                self._count(kind)
+                if attempt == self.max_attempts:
+                    # the breaker counts calls that failed after all their retries, not single attempts
+                    self.breaker.record_failure()
+                    self._count("failed")
+                    raise
+                delay = self.backoff(attempt, _retry_after(e))
+                self._count("retries")
+                self._waited("backoff", delay)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            counters = {name: round(value, 3) if isinstance(value, float) else value
+                        for name, value in self.counters.items()}
+        return {**counters, "breaker": self.breaker.state}
+
+
+class Outbound:
+    """
+    The process-wide set of Services, created on first use from `defaults`
+    and the OUTBOUND_<SERVICE>_RATE / _BURST / _ATTEMPTS environment variables.
+    """
+
+    def __init__(self, defaults=SERVICE_DEFAULTS):
+        self.defaults = defaults
+        self._overrides = None
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def override(self, defaults):
+        """
+        Build every service from `defaults` instead, ignoring the environment;
+        used by the offline benchmarks, whose fakes have no rate limits to
+        respect. Services already built are replaced. Pass None to remove
+        the override.
+        """
+        with self._lock:
+            self._overrides = defaults
+            self._services = {}
+
+    def _settings(self, name):
+        if self._overrides is not None:
+            return self._overrides.get(name, (5.0, 5, 3, 0.5, 8.0))
+        rate, burst, attempts, base_delay, max_delay = self.defaults.get(name, (5.0, 5, 3, 0.5, 8.0))
+        prefix = f"OUTBOUND_{name.upper()}"
+        return (
+            float(os.getenv(f"{prefix}_RATE", rate)),
+            float(os.getenv(f"{prefix}_BURST", burst)),
+            int(os.getenv(f"{prefix}_ATTEMPTS", attempts)),
+            base_delay,
+            max_delay,
+        )
+
+    def service(self, name):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = self._services[name] = Service(name, *self._settings(name))
+        return service
+
+    def stats(self):
+        with self._lock:
+            services = dict(self._services)
+        return {name: service.stats() for name, service in sorted(services.items())}
+
+
+_outbound = Outbound()
+
+
+def get_outbound():
+    return _outbound
+
+
+def call(service, func, *args, **kwargs):
+    """Call func(*args, **kwargs) through the named service's rate limit, retries and circuit breaker."""
+    return _outbound.service(service).call(func, *args, **kwargs)
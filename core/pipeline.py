@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from core.budget import Usage
+from core.exports import FORMATS, get_download_data, pdf_missing_glyphs
+from core.metrics import get_metrics
+from core.normalize import TranscriptNormalizer
+from core.summarize import DEFAULT_PROMPT
+from core.youtube import extract_video_id, load_transcript
+
+NORMALIZE_TRANSCRIPTS = os.getenv("NORMALIZE_TRANSCRIPTS", "1") != "0"
+
+
+def _safe_name(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text)
+
+
+def _write(path, data):
+    # write to a temp file first so a crash never leaves a half-written export
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def normalize_transcript(transcript, segments):
+    """
+    Run the normalization stage on a fetched transcript. Returns
+    (text, report dict); transcripts without segments (title/description
+    fallback) are passed through with report None.
+    """
+    if segments is None or not NORMALIZE_TRANSCRIPTS:
+        return transcript, None
+    text, report = TranscriptNormalizer(segments.language).normalize(segments.texts())
+    return text, report.as_dict()
+
+
+def prepare_transcript(video_id, youtube_api_key=None, transcript_cache=None, details=None):
+    """
+    The fetch and normalize stages of one video: (text, segments,
+    normalization report), text None when there is neither a transcript
+    nor video details. Runs ahead of the summary for prefetches and batches.
+    """
+    metrics = get_metrics()
+    with metrics.span("fetch", video_id=video_id) as span:
+        transcript, segments = load_transcript(video_id, youtube_api_key, transcript_cache, details)
+        span["bytes_out"] = len(transcript.encode("utf-8")) if transcript else 0
+    if not transcript:
+        return None, None, None
+    with metrics.span("normalize", video_id=video_id) as span:
+        span["bytes_in"] = len(transcript.encode("utf-8"))
+        transcript, normalization = normalize_transcript(transcript, segments)
+        span["bytes_out"] = len(transcript.encode("utf-8"))
+    return transcript, segments, normalization
+
+
+def generate_notes(youtube_url, summarizer, prompt=DEFAULT_PROMPT, youtube_api_key=None, on_text=None,
+                   transcript_cache=None, on_progress=None, fetched=None):
+    """
+    Fetch and normalize the transcript of one video and stream its notes,
+    calling on_text(piece) as pieces arrive and on_progress(done, total,
+    restored) as map chunks of a long transcript finish. `fetched` is a
+    future of prepare_transcript's result when that ran ahead; if it was
+    cancelled the transcript is fetched here. Returns {"summary",
+    "transcript", "segments", "video_id", "usage", "normalization"}.
+    """
+    metrics = get_metrics()
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        raise ValueError("Not a valid YouTube link.")
+    if fetched is not None:
+        try:
+            with metrics.span("fetch_wait", video_id=video_id):
+                transcript, segments, normalization = fetched.result()
+        except CancelledError:
+            fetched = None
+    if fetched is None:
+        transcript, segments, normalization = prepare_transcript(video_id, youtube_api_key, transcript_cache)
+    if not transcript:
+        raise ValueError("Could not fetch transcript or video details. Please check the URL or try another video.")
+
+    usage = Usage(summarizer.model)
+    pieces = []
+    with metrics.span("summarize", video_id=video_id) as span:
+        span["bytes_in"] = len(transcript.encode("utf-8"))
+        for piece in summarizer.stream(transcript, prompt, video_id=video_id, usage=usage, on_progress=on_progress):
+            pieces.append(piece)
+            if on_text:
+                on_text(piece)
+        span["bytes_out"] = sum(len(piece.encode("utf-8")) for piece in pieces)
+    return {
+        "summary": "".join(pieces),
+        "transcript": transcript,
+        "segments": segments,
+        "video_id": video_id,
+        "usage": usage.as_dict(),
+        "normalization": normalization,
+    }
+
+
+def process_video(url, summarizer, out_dir, translator=None, targets=(), export_format="Word",
+                  prompt=DEFAULT_PROMPT, youtube_api_key=None, transcript_cache=None, details=None):
+    """
+    Run fetch -> summarize -> translate -> export for one URL and write the
+    files into out_dir. `details` is the batch-fetched metadata of the
+    videos (see youtube.fetch_videos_details), if any. Returns a status
+    dict; errors are reported in it rather than raised, so one bad video
+    never stops a batch.
+    """
+    started = time.monotonic()
+    result = {"url": url, "video_id": None, "status": "ok", "error": None, "files": [], "stages": {}}
+
+    def stage(name, func, *args, **kwargs):
+        stage_started = time.monotonic()
+        try:
+            # "translate:hi" and "export:original" share one metrics stage each
+            with get_metrics().span(name.split(":")[0], video_id=result["video_id"]):
+                return func(*args, **kwargs)
+        finally:
+            result["stages"][name] = round(time.monotonic() - stage_started, 3)
+
+    try:
+        video_id = extract_video_id(url)
+        result["video_id"] = video_id
+        if not video_id:
+            result["status"] = "invalid_url"
+            return result
+        if details and video_id in details:
+            result["title"] = details[video_id]["title"]
+
+        transcript, segments = stage("fetch", load_transcript, video_id, youtube_api_key, transcript_cache, details)
+        if not transcript:
+            result["status"] = "no_transcript"
+            return result
+        transcript, result["normalization"] = stage("normalize", normalize_transcript, transcript, segments)
+
+        usage = Usage(summarizer.model)
+        summary = stage("summarize", summarizer.generate, transcript, prompt, video_id=video_id, usage=usage)
+        result["usage"] = usage.as_dict()
+        documents = {"": summary}
+        for target in targets:
+            documents[target] = stage(f"translate:{target}", translator.translate, summary, target)
+
+        for lang, text in documents.items():
+            name = _safe_name(video_id if not lang else f"{video_id}.{lang}")
+            doc_format = export_format
+            if doc_format == "PDF" and pdf_missing_glyphs(text):
+                # no installed font has this script, a text file beats a blank PDF
+                doc_format = "Text"
+            path = os.path.join(out_dir, f"{name}.{FORMATS[doc_format]['ext']}")
+            stage(f"export:{lang or 'original'}", lambda: _write(path, get_download_data(doc_format, text)))
+            result["files"].append(path)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+class ResultLog:
+    """Append-only JSON-lines log of per-video results, safe to share between worker threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def completed_urls(self):
+        """URLs that already finished successfully, so a rerun can skip them."""
+        done = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if record.get("status") == "ok":
+                        done.add(record["url"])
+        return done
+
+    def append(self, result):
+        line = json.dumps(result, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
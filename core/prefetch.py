@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import get_metrics
+from core.pipeline import prepare_transcript
+
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL_SECONDS", "300"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+PREFETCH_MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", "32"))
+
+
+class TranscriptPrefetcher:
+    """
+    Speculative fetch and normalization of a transcript, started as soon as a
+    video link is entered instead of when its notes are requested. Results
+    are kept in memory for `ttl` seconds and handed to the notes job by
+    take(), so the click only waits for Gemini.
+
+    A prefetch belongs to the owners (sessions) that asked for it. When an
+    owner moves on to another link its old prefetch is cancelled unless
+    someone else still wants it: a queued fetch never starts, a running one
+    finishes but its result is dropped. A taken prefetch is never cancelled.
+    """
+
+    def __init__(self, fetch=prepare_transcript, ttl=PREFETCH_TTL, max_workers=PREFETCH_WORKERS,
+                 max_entries=PREFETCH_MAX_ENTRIES):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # video_id -> {"future", "started", "owners", "taken"}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    @staticmethod
+    def _usable(entry):
+        future = entry["future"]
+        return not future.cancelled() and not (future.done() and future.exception() is not None)
+
+    def _drop(self, video_id, outcome):
+        entry = self._entries.pop(video_id)
+        if not entry["taken"] and not entry["future"].done():
+            # a fetch already running cannot be stopped, its result is just not kept
+            outcome = "cancelled" if entry["future"].cancel() else "dropped"
+        get_metrics().count("prefetch_total", outcome=outcome)
+
+    def _expire(self):
+        now = time.monotonic()
+        for video_id, entry in list(self._entries.items()):
+            if now - entry["started"] > self.ttl:
+                self._drop(video_id, "expired")
+
+    def prefetch(self, video_id, owner, *args):
+        """
+        Start, or join, the prefetch of video_id for `owner`; the owner's
+        prefetches of other videos are released. Extra args go to the fetch.
+        """
+        with self._lock:
+            self._expire()
+            for other_id, entry in list(self._entries.items()):
+                if other_id != video_id and owner in entry["owners"]:
+                    entry["owners"].discard(owner)
+                    if not entry["owners"] and not entry["future"].done():
+                        self._drop(other_id, "abandoned")
+
+            entry = self._entries.get(video_id)
+            if entry is not None and self._usable(entry):
+                entry["owners"].add(owner)
+                return entry["future"]
+            future = self._pool.submit(self._fetch, video_id, *args)
+            self._entries[video_id] = {"future": future, "started": time.monotonic(), "owners": {owner},
+                                       "taken": False}
+            get_metrics().count("prefetch_total", outcome="started")
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)), "evicted")
+            return future
+
+    def release(self, owner):
+        """The owner left its link (cleared it or left the page): cancel what only it wanted."""
+        with self._lock:
+            for video_id, entry in list(self._entries.items()):
+                entry["owners"].discard(owner)
+                if not entry["owners"] and not entry["future"].done():
+                    self._drop(video_id, "abandoned")
+
+    def take(self, video_id):
+        """The prefetch future of video_id for the notes job, or None to fetch it there."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(video_id)
+            if entry is None or not self._usable(entry):
+                get_metrics().cache("prefetch", misses=1)
+                return None
+            entry["taken"] = True
+            get_metrics().cache("prefetch", hits=1)
+            return entry["future"]
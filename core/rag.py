@@ -0,0 +1,284 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from core import outbound
+from core.metrics import get_metrics
+from core.search import tokenize
+
+RAG_CHUNK_CHARS = int(os.getenv("RAG_CHUNK_CHARS", "800"))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+# "gemini" embeds with the Gemini embedding model, "local" with the hashing fallback
+RAG_EMBEDDINGS = os.getenv("RAG_EMBEDDINGS", "gemini")
+RAG_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "gemini-embedding-001")
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join("cache", "vectors"))
+RAG_MAX_INDEXES = int(os.getenv("RAG_MAX_INDEXES", "32"))
+LOCAL_DIMENSIONS = 1024
+
+QA_PROMPT = """You are answering a question about a YouTube video. Below are the parts of its transcript that are most relevant to the question, each marked with the time it starts at. Answer only from these excerpts, cite the times you rely on like [12:34], and say so if the excerpts do not contain the answer.
+
+Question: {question}
+"""
+
+
+def format_time(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60}:{rest % 60:02d}"
+
+
+# --- Embeddings ---
+
+class LocalEmbedding:
+    """
+    Deterministic embedding without any model: word and word-pair features
+    hashed into a fixed number of dimensions (feature hashing), sublinear
+    term weights, L2-normalized. Stable across processes and machines, so
+    stored indexes stay valid; it matches on shared vocabulary, not meaning.
+    """
+
+    def __init__(self, dimensions=LOCAL_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"local-{dimensions}"
+
+    def _features(self, text):
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def __call__(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # the top bit picks the sign, so collisions cancel out instead of piling up
+                key = (h % self.dimensions, -1.0 if h & 0x80000000 else 1.0)
+                counts[key] = counts.get(key, 0) + 1
+            for (column, sign), count in counts.items():
+                vectors[row, column] += sign * (1.0 + np.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class GeminiEmbedding:
+    """Embeddings from the Gemini API, batched; rows are L2-normalized."""
+
+    BATCH = 100
+
+    def __init__(self, client, model=RAG_EMBEDDING_MODEL):
+        self.client = client
+        self.model = model
+        self.name = model.replace("/", "_")
+
+    def __call__(self, texts):
+        rows = []
+        for start in range(0, len(texts), self.BATCH):
+            response = outbound.call(
+                "gemini", self.client.models.embed_content, model=self.model, contents=texts[start:start + self.BATCH]
+            )
+            rows.extend(embedding.values for embedding in response.embeddings)
+        vectors = np.asarray(rows, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def default_embedding(client=None):
+    """The configured embedding function; the local one without a client or with RAG_EMBEDDINGS=local."""
+    if client is not None and RAG_EMBEDDINGS == "gemini":
+        return GeminiEmbedding(client)
+    return LocalEmbedding()
+
+
+# --- Chunking ---
+
+def chunk_transcript(transcript, segments=None, max_chars=RAG_CHUNK_CHARS):
+    """
+    Split a transcript into ~max_chars passages for retrieval. With timestamped
+    segments the passages follow segment boundaries and carry their start
+    time; otherwise they are cut on sentence boundaries and the time is None.
+    Returns (texts, starts).
+    """
+    texts, starts = [], []
+    if segments is not None and len(segments):
+        parts, size, start = [], 0, None
+        for index in range(len(segments)):
+            segment_start, _, text = segments[index]
+            text = text.strip()
+            if not text:
+                continue
+            if start is None:
+                start = segment_start
+            parts.append(text)
+            size += len(text) + 1
+            if size >= max_chars:
+                texts.append(" ".join(parts))
+                starts.append(start)
+                parts, size, start = [], 0, None
+        if parts:
+            texts.append(" ".join(parts))
+            starts.append(start)
+        return texts, starts
+
+    sentences = re.split(r"(?<=[.!?।])\s+", (transcript or "").strip())
+    parts, size = [], 0
+    for sentence in sentences:
+        if parts and size + len(sentence) > max_chars:
+            texts.append(" ".join(parts))
+            parts, size = [], 0
+        # a sentence longer than a chunk (captions without punctuation) is cut on words
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            texts.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            parts.append(sentence)
+            size += len(sentence) + 1
+    if parts:
+        texts.append(" ".join(parts))
+    return texts, [None] * len(texts)
+
+
+# --- Index ---
+
+class VideoIndex:
+    """The chunk vectors of one video, searched by cosine similarity with NumPy."""
+
+    def __init__(self, video_id, texts, starts, vectors, embedding):
+        self.video_id = video_id
+        self.texts = texts
+        self.starts = starts
+        self.vectors = vectors
+        self.embedding = embedding
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, question, k=RAG_TOP_K):
+        """Top-k chunks as [{"text", "start", "score"}], in transcript order."""
+        if not len(self):
+            return []
+        query = self.embedding([question])[0]
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [
+            {"text": self.texts[i], "start": self.starts[i], "score": float(scores[i])}
+            for i in sorted(top.tolist())
+        ]
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vectors=self.vectors,
+            texts=np.array(self.texts, dtype=str),
+            starts=np.array([np.nan if s is None else s for s in self.starts], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, video_id, embedding):
+        with np.load(path, allow_pickle=False) as data:
+            starts = [None if np.isnan(s) else float(s) for s in data["starts"]]
+            return cls(video_id, data["texts"].tolist(), starts, data["vectors"], embedding)
+
+
+class VideoIndexStore:
+    """
+    Vector indexes per video_id, built once and reused for every question:
+    kept in an in-process LRU and saved as .npz files so a restart does not
+    re-embed. If the embedding function fails while building, the index is
+    built with the local fallback instead (and queried with it too).
+    """
+
+    def __init__(self, embedding=None, directory=RAG_INDEX_DIR, max_indexes=RAG_MAX_INDEXES,
+                 chunk_chars=RAG_CHUNK_CHARS):
+        self.embedding = embedding or LocalEmbedding()
+        self.fallback = LocalEmbedding()
+        self.directory = directory
+        self.max_indexes = max_indexes
+        self.chunk_chars = chunk_chars
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}  # video_id -> lock, so two sessions never embed the same video twice
+
+    def _path(self, video_id, embedding):
+        key = hashlib.sha256(f"{video_id}|{embedding.name}|{self.chunk_chars}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _remember(self, video_id, index):
+        with self._lock:
+            self._indexes[video_id] = index
+            self._indexes.move_to_end(video_id)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+    def get(self, video_id):
+        with self._lock:
+            index = self._indexes.get(video_id)
+            if index is not None:
+                self._indexes.move_to_end(video_id)
+            return index
+
+    def get_or_build(self, video_id, transcript, segments=None):
+        index = self.get(video_id)
+        if index is not None:
+            return index
+        with self._lock:
+            build_lock = self._building.setdefault(video_id, threading.Lock())
+        with build_lock:
+            index = self.get(video_id)
+            if index is None:
+                index = self._load(video_id) or self._build(video_id, transcript, segments)
+                self._remember(video_id, index)
+        with self._lock:
+            self._building.pop(video_id, None)
+        return index
+
+    def _load(self, video_id):
+        for embedding in (self.embedding, self.fallback):
+            path = self._path(video_id, embedding)
+            if os.path.exists(path):
+                try:
+                    return VideoIndex.load(path, video_id, embedding)
+                except (OSError, ValueError, KeyError):
+                    pass  # unreadable file, rebuild it
+        return None
+
+    def _build(self, video_id, transcript, segments):
+        texts, starts = chunk_transcript(transcript, segments, self.chunk_chars)
+        with get_metrics().span("rag_index", video_id=video_id, chunks=len(texts)) as span:
+            span["bytes_in"] = sum(len(text.encode("utf-8")) for text in texts)
+            embedding = self.embedding
+            try:
+                vectors = embedding(texts) if texts else np.zeros((0, 1), dtype=np.float32)
+            except Exception:
+                if embedding is self.fallback:
+                    raise
+                embedding = self.fallback
+                vectors = embedding(texts)
+            span["embedding"] = embedding.name
+        index = VideoIndex(video_id, texts, starts, vectors, embedding)
+        if video_id and texts:
+            os.makedirs(self.directory, exist_ok=True)
+            index.save(self._path(video_id, embedding))
+        return index
+
+
+def build_question_context(index, question, k=RAG_TOP_K):
+    """
+    (prompt, context, chunks) for one question: only the top-k chunks are
+    sent, so the prompt size does not grow with the length of the video.
+    """
+    chunks = index.search(question, k)
+    context = "\n\n".join(
+        (f"[{format_time(chunk['start'])}] " if chunk["start"] is not None else "") + chunk["text"]
+        for chunk in chunks
+    )
+    return QA_PROMPT.format(question=question.strip()), context, chunks
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting. Returns False if the bucket is short."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until `tokens` are available. Returns False if `timeout` runs out first."""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket capacity")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.waited_seconds += now - started
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            # sleep outside the lock so other threads can refill / check meanwhile
+            time.sleep(wait)
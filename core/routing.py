@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.budget import OUTPUT_RESERVE, Usage, estimate_tokens, model_limits
+from core.metrics import get_metrics, percentile
+from core.summarize import CHUNK_TOKENS, DEFAULT_PROMPT, GEMINI_MODEL, SUMMARY_WORKERS, Summarizer
+
+# Model tiers, best first. A tier takes transcripts up to max_tokens (None: any length);
+# the last tier is the fallback when no other one fits the request.
+ROUTES = [
+    {
+        "name": "flash",
+        "model": os.getenv("ROUTE_FLASH_MODEL", GEMINI_MODEL),
+        "max_tokens": int(os.getenv("ROUTE_FLASH_MAX_TOKENS", "120000")),
+    },
+    {
+        "name": "lite",
+        "model": os.getenv("ROUTE_LITE_MODEL", "models/gemini-flash-lite-latest"),
+        "max_tokens": None,
+    },
+]
+# Per-request budgets a tier must fit in, 0 turns the check off
+ROUTE_MAX_COST = float(os.getenv("ROUTE_MAX_COST_USD", "0"))
+ROUTE_MAX_SECONDS = float(os.getenv("ROUTE_MAX_SECONDS", "0"))
+# Typical length of the final notes, for the cost estimate
+NOTES_TOKENS = 2000
+
+# Hedged Gemini calls: "off", "p95" (the model's recent p95 latency) or a fixed number of seconds
+HEDGE_AFTER = os.getenv("HEDGE_AFTER", "off")
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "32"))
+# Latency-based decisions wait for this many samples of a model or tier
+MIN_SAMPLES = 20
+LATENCY_WINDOW = 256
+
+
+def estimate_cost(model, tokens, chunk_tokens=CHUNK_TOKENS):
+    """Rough USD cost of summarizing a transcript of `tokens` tokens with `model`, map-reduce included."""
+    limits = model_limits(model)
+    window = limits["input"] - OUTPUT_RESERVE
+    if tokens > (min(window, chunk_tokens) if chunk_tokens else window):
+        # the map notes are about a quarter of their input and are read again by the reduce pass
+        notes = tokens // 4
+        input_tokens, output_tokens = tokens + notes, notes + NOTES_TOKENS
+    else:
+        input_tokens, output_tokens = tokens, NOTES_TOKENS
+    return (input_tokens * limits["price_input"] + output_tokens * limits["price_output"]) / 1_000_000
+
+
+class LatencyWindow:
+    """Recent latency samples per key, thread-safe."""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, value):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.size)).append(value)
+
+    def percentile(self, key, fraction, min_samples=MIN_SAMPLES):
+        """The percentile over the window, or None until there are min_samples samples."""
+        with self._lock:
+            values = sorted(self._samples.get(key, ()))
+        return percentile(values, fraction) if len(values) >= min_samples else None
+
+
+# --- Hedged requests ---
+
+class Hedger:
+    """
+    Hedged requests: when a call has not returned after `after` seconds (or
+    after the recent p95 latency of its key), the same call is sent a second
+    time and whichever answers first is used. The slower one is left to
+    finish and ignored. With a p95 delay about one call in twenty is
+    duplicated, which cuts the tail a slow backend instance causes.
+    """
+
+    def __init__(self, after=HEDGE_AFTER, max_workers=HEDGE_WORKERS, min_samples=MIN_SAMPLES):
+        self.after = after
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-hedge")
+
+    def delay(self, key):
+        """Seconds to wait before hedging a call of `key`, None to not hedge it."""
+        if self.after in (None, "", "off", "0"):
+            return None
+        if self.after == "p95":
+            return self.latencies.percentile(key, 0.95, self.min_samples)
+        return float(self.after)
+
+    def call(self, key, func, *args, discard=None, **kwargs):
+        """
+        Returns (result, hedge): hedge is None when no duplicate was sent,
+        otherwise "primary" or "hedge" for the call that answered first.
+        discard(result) is called with the result of the slower call, if it
+        succeeds too, to release what it holds (e.g. an open stream).
+        """
+        started = time.monotonic()
+
+        def timed(future):
+            # every first call is sampled, also when it lost, so hedging cannot shrink its own p95
+            if not future.cancelled() and future.exception() is None:
+                self.latencies.add(key, time.monotonic() - started)
+
+        def discarded(future):
+            if not future.cancelled() and future.exception() is None:
+                discard(future.result())
+
+        delay = self.delay(key)
+        if delay is None:
+            result = func(*args, **kwargs)
+            self.latencies.add(key, time.monotonic() - started)
+            return result, None
+
+        primary = self._pool.submit(func, *args, **kwargs)
+        primary.add_done_callback(timed)
+        if wait([primary], timeout=delay).done:
+            return primary.result(), None
+
+        hedge = self._pool.submit(func, *args, **kwargs)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = "hedge" if future is hedge else "primary"
+                    get_metrics().count("hedged_calls_total", key=key, winner=winner)
+                    if discard is not None:
+                        (primary if future is hedge else hedge).add_done_callback(discarded)
+                    return future.result(), winner
+                error = error or future.exception()
+        get_metrics().count("hedged_calls_total", key=key, winner="none")
+        raise error
+
+
+# --- Routing ---
+
+class ModelRouter:
+    """
+    Picks the model tier of each summary from the transcript length and the
+    cost and latency budgets, then runs it on that tier's Summarizer; it has
+    the same generate / stream interface. Tiers are tried best first and one
+    is skipped when the transcript is longer than its max_tokens, its
+    estimated cost is over max_cost, or its recent p95 time per 1k tokens
+    predicts more than max_seconds. Every request is observed as a
+    "route:<tier>" metrics stage with the reason it was routed there, so each
+    tier's p50/p95/p99 shows on the admin page for tuning the thresholds.
+
+    The budgets can route the same video differently from one request to the
+    next, so the router owns the summary cache: a summary cached under any
+    tier is served before routing, and a video with map-pass checkpoints
+    stays on the tier that saved them until it is finished.
+    """
+
+    def __init__(self, client, cache=None, checkpoints=None, routes=ROUTES, max_cost=ROUTE_MAX_COST,
+                 max_seconds=ROUTE_MAX_SECONDS, hedger=None, max_workers=SUMMARY_WORKERS):
+        self.routes = routes
+        self.max_cost = max_cost
+        self.max_seconds = max_seconds
+        self.hedger = hedger if hedger is not None else Hedger()
+        self.cache = cache
+        self.checkpoints = checkpoints
+        # one map pool for all tiers, so the cap on concurrent Gemini calls stays process-wide
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-map")
+        self.summarizers = {
+            route["name"]: Summarizer(client, None, route["model"], checkpoints=checkpoints,
+                                      hedger=self.hedger, pool=pool)
+            for route in routes
+        }
+        self.latencies = LatencyWindow()  # tier -> seconds per 1k transcript tokens
+
+    @property
+    def model(self):
+        return self.routes[0]["model"]
+
+    def predicted_seconds(self, name, tokens):
+        per_1k = self.latencies.percentile(name, 0.95)
+        return None if per_1k is None else per_1k * max(tokens, 1000) / 1000
+
+    def choose(self, transcript_text, video_id=None):
+        """
+        (route, tokens, reason): reason is "preferred", "resume" for a video
+        with checkpoints on a tier, or why the better tiers were skipped.
+        """
+        tokens = estimate_tokens(transcript_text)
+        if video_id and self.checkpoints is not None:
+            resumable = self.checkpoints.models(video_id)
+            for route in self.routes:
+                if route["model"] in resumable:
+                    return route, tokens, "resume"
+        reason = "preferred"
+        for route in self.routes[:-1]:
+            predicted = self.predicted_seconds(route["name"], tokens)
+            if route["max_tokens"] and tokens > route["max_tokens"]:
+                reason = "length"
+            elif self.max_cost and estimate_cost(route["model"], tokens) > self.max_cost:
+                reason = "cost"
+            elif self.max_seconds and predicted is not None and predicted > self.max_seconds:
+                reason = "latency"
+            else:
+                return route, tokens, reason
+        return self.routes[-1], tokens, reason
+
+    def _cached(self, prompt, video_id, usage):
+        """The summary cached under any tier, best first, or None."""
+        if not video_id or self.cache is None:
+            return None
+        model, summary = self.cache.get_any(video_id, prompt, [route["model"] for route in self.routes])
+        if summary is None:
+            return None
+        route = next(route for route in self.routes if route["model"] == model)
+        if usage is not None:
+            usage.model, usage.route = route["model"], route["name"]
+        # a cache hit says nothing about the tier's latency
+        get_metrics().count("route_total", route=route["name"], reason="cached")
+        return summary
+
+    def _route(self, transcript_text, video_id, usage):
+        route, tokens, reason = self.choose(transcript_text, video_id)
+        if usage is None:
+            usage = Usage(route["model"])
+        usage.model, usage.route = route["model"], route["name"]
+        return route, tokens, reason, usage
+
+    def _served(self, route, tokens, reason, usage, started, error=None):
+        metrics = get_metrics()
+        seconds = time.monotonic() - started
+        metrics.count("route_total", route=route["name"], reason=reason)
+        metrics.observe(f"route:{route['name']}", seconds, error, {
+            "model": route["model"], "tokens": tokens, "reason": reason, "hedges": usage.hedges,
+        })
+        if error is None:
+            self.latencies.add(route["name"], seconds * 1000 / max(tokens, 1000))
+
+    def _store(self, route, prompt, video_id, summary):
+        if video_id and self.cache is not None:
+            self.cache.set(video_id, prompt, route["model"], summary)
+
+    def generate(self, transcript_text, prompt=DEFAULT_PROMPT, video_id=None, usage=None, on_progress=None):
+        summary = self._cached(prompt, video_id, usage)
+        if summary is not None:
+            return summary
+        route, tokens, reason, usage = self._route(transcript_text, video_id, usage)
+        started = time.monotonic()
+        try:
+            summary = self.summarizers[route["name"]].generate(
+                transcript_text, prompt, video_id=video_id, usage=usage, on_progress=on_progress
+            )
+        except Exception as e:
+            self._served(route, tokens, reason, usage, started, type(e).__name__)
+            raise
+        self._served(route, tokens, reason, usage, started)
+        self._store(route, prompt, video_id, summary)
+        return summary
+
+    def stream(self, transcript_text, prompt=DEFAULT_PROMPT, video_id=None, usage=None, on_progress=None):
+        summary = self._cached(prompt, video_id, usage)
+        if summary is not None:
+            yield summary
+            return
+        route, tokens, reason, usage = self._route(transcript_text, video_id, usage)
+        started = time.monotonic()
+        pieces = []
+        try:
+            for piece in self.summarizers[route["name"]].stream(
+                transcript_text, prompt, video_id=video_id, usage=usage, on_progress=on_progress
+            ):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            self._served(route, tokens, reason, usage, started, type(e).__name__)
+            raise
+        self._served(route, tokens, reason, usage, started)
+        self._store(route, prompt, video_id, "".join(pieces))
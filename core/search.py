@@ -0,0 +1,186 @@
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from core.sqlite_store import SQLiteStore
+
+DEFAULT_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join("data", "search.sqlite3"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Terms in the notes count more than terms that only appear in the transcript
+SUMMARY_WEIGHT = 2
+TRANSCRIPT_WEIGHT = 1
+# The last query word also matches longer terms while typing ("transf" -> "transformers")
+PREFIX_EXPANSIONS = 16
+
+# A token is a run of letters, digits and combining marks. \w alone would split
+# Indic words at every vowel sign and virama, so the Indic blocks (Devanagari
+# to Sinhala, minus the danda punctuation) and Latin combining accents are added.
+_TOKEN = re.compile(r"(?:[^\W_]|[\u0300-\u036f\u0900-\u0963\u0966-\u0dff])+")
+# Zero-width joiners carry no meaning for matching but split words under \w
+_JOINERS = dict.fromkeys(map(ord, "\u200c\u200d\u00ad"))
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text):
+    """Lower-cased, NFC-normalized word tokens of `text`, in any script."""
+    text = unicodedata.normalize("NFC", (text or "").translate(_JOINERS)).casefold()
+    return [token for token in _TOKEN.findall(text) if token not in STOPWORDS]
+
+
+class SearchIndex(SQLiteStore):
+    """
+    Incremental inverted index with BM25 ranking over a user's notes and
+    the transcripts they were made from.
+
+    Postings are keyed by (term, username, doc_id) and carry the document
+    length, so a query reads only the posting ranges of its own terms for one
+    user and SQLite scores them in a single aggregate. Documents are added as
+    they are saved; re-adding a doc_id replaces it. Corpus statistics
+    (document count, total length) are kept up to date in the same transaction.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        super().__init__(path)
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    PRIMARY KEY (term, username, doc_id)
+                ) WITHOUT ROWID"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS docs (
+                    doc_id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    terms TEXT NOT NULL
+                )"""
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('docs', 0), ('length', 0)")
+
+    @staticmethod
+    def _term_frequencies(summary, transcript):
+        counts = Counter()
+        for token in tokenize(summary):
+            counts[token] += SUMMARY_WEIGHT
+        for token in tokenize(transcript):
+            counts[token] += TRANSCRIPT_WEIGHT
+        return counts
+
+    def _remove(self, conn, doc_id):
+        row = conn.execute("SELECT username, length, terms FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return
+        username, length, terms = row
+        terms = terms.split(" ") if terms else []
+        conn.executemany("DELETE FROM postings WHERE term = ? AND username = ? AND doc_id = ?",
+                         [(term, username, doc_id) for term in terms])
+        conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+        conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        conn.execute("UPDATE stats SET value = value - 1 WHERE name = 'docs'")
+        conn.execute("UPDATE stats SET value = value - ? WHERE name = 'length'", (length,))
+
+    def add_many(self, documents):
+        """Index (doc_id, username, summary, transcript) tuples in one transaction."""
+        prepared = [
+            (doc_id, username, self._term_frequencies(summary, transcript))
+            for doc_id, username, summary, transcript in documents
+        ]
+        if not prepared:
+            return
+        with self._transaction() as conn:
+            for doc_id, username, counts in prepared:
+                self._remove(conn, doc_id)
+                length = sum(counts.values())
+                conn.execute("INSERT INTO docs VALUES (?, ?, ?, ?)", (doc_id, username, length, " ".join(counts)))
+                conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?)",
+                                 [(term, username, doc_id, tf, length) for term, tf in counts.items()])
+                conn.executemany("INSERT INTO terms VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                                 [(term,) for term in counts])
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'docs'")
+                conn.execute("UPDATE stats SET value = value + ? WHERE name = 'length'", (length,))
+
+    def add(self, doc_id, username, summary, transcript=""):
+        self.add_many([(doc_id, username, summary, transcript)])
+
+    def indexed_ids(self):
+        return {row[0] for row in self._connect().execute("SELECT doc_id FROM docs")}
+
+    def _expand_prefix(self, conn, prefix):
+        rows = conn.execute(
+            "SELECT term FROM terms WHERE term >= ? AND term < ? AND df > 0 ORDER BY df DESC LIMIT ?",
+            (prefix, prefix + "\U0010ffff", PREFIX_EXPANSIONS),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, username, query, limit=20):
+        """[(doc_id, score)] of the user's best matching documents, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._connect()
+        stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        total_docs = stats.get("docs", 0)
+        if not total_docs:
+            return []
+        avg_length = stats.get("length", 0) / total_docs
+
+        query_terms = {term: 1.0 for term in terms}
+        for term in self._expand_prefix(conn, terms[-1]):
+            query_terms.setdefault(term, 0.5)  # completions rank below the exact word
+
+        document_frequencies = conn.execute(
+            f"SELECT term, df FROM terms WHERE df > 0 AND term IN ({','.join('?' * len(query_terms))})",
+            list(query_terms),
+        ).fetchall()
+        if not document_frequencies:
+            return []
+        # query weight * idf per term; the per-posting BM25 sum runs inside SQLite
+        weights = [
+            (term, query_terms[term] * math.log(1 + (total_docs - df + 0.5) / (df + 0.5)))
+            for term, df in document_frequencies
+        ]
+        return conn.execute(
+            f"""WITH query(term, weight) AS (VALUES {','.join(['(?, ?)'] * len(weights))})
+            SELECT p.doc_id, SUM(query.weight * p.tf * ? / (p.tf + ? + ? * p.length)) AS score
+            FROM query JOIN postings p ON p.term = query.term AND p.username = ?
+            GROUP BY p.doc_id ORDER BY score DESC LIMIT ?""",
+            (*(value for pair in weights for value in pair),
+             K1 + 1, K1 * (1 - B), K1 * B / avg_length, username, limit),
+        ).fetchall()
+
+    def stats(self):
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        counters["terms"] = conn.execute("SELECT COUNT(*) FROM terms WHERE df > 0").fetchone()[0]
+        return counters
+
+
+def snippet(text, query, width=160):
+    """A short excerpt of `text` around the first query word it contains."""
+    text = " ".join(re.sub(r"[#*`>|]+", " ", text or "").split())  # markdown markers read as noise here
+    folded = text.casefold()
+    position = -1
+    for term in tokenize(query):
+        position = folded.find(term)
+        if position >= 0:
+            break
+    if position < 0:
+        return text[:width] + ("…" if len(text) > width else "")
+    start = max(0, position - width // 3)
+    end = min(len(text), start + width)
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
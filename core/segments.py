@@ -0,0 +1,140 @@
+import struct
+from array import array
+from bisect import bisect_right
+
+_HEADER = struct.Struct("<4sIQH")  # magic, segment count, text byte length, language byte length
+_MAGIC = b"TSG2"
+
+
+class TranscriptSegments:
+    """
+    Compact, columnar store of timestamped transcript segments.
+
+    Starts and durations live in two float arrays, the text of all segments
+    in one UTF-8 buffer (segments separated by a space) with an array of byte
+    offsets, instead of one Python object per segment. Time lookups are
+    binary searches over the starts, and slices share the parent's buffers
+    through memoryviews, so slicing by time copies nothing.
+    """
+
+    def __init__(self, starts, durations, offsets, text, language=None):
+        # memoryviews over array / bytes buffers; offsets has len(starts) + 1
+        # entries and indexes into the full text buffer
+        self.language = language
+        self._starts = memoryview(starts)
+        self._durations = memoryview(durations)
+        self._offsets = memoryview(offsets)
+        self._text = memoryview(text)
+
+    @classmethod
+    def from_items(cls, items, language=None):
+        """Build from youtube_transcript_api snippets (or dicts with text/start/duration)."""
+        starts = array("d")
+        durations = array("d")
+        offsets = array("q", [0])
+        parts = []
+        size = 0
+        for item in items:
+            if hasattr(item, "text"):
+                text, start, duration = item.text, item.start, item.duration
+            else:
+                text, start, duration = item.get("text", ""), item.get("start", 0.0), item.get("duration", 0.0)
+            encoded = " ".join((text or "").split()).encode("utf-8")
+            if parts:
+                encoded = b" " + encoded
+            parts.append(encoded)
+            size += len(encoded)
+            starts.append(float(start))
+            durations.append(float(duration))
+            offsets.append(size)
+        return cls(starts, durations, offsets, b"".join(parts), language)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        """(start, duration, text) of one segment."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return self._starts[index], self._durations[index], self.text_at(index)
+
+    def text_at(self, index):
+        return bytes(self._text[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8").lstrip(" ")
+
+    def texts(self):
+        """Iterate over the segment texts."""
+        for index in range(len(self)):
+            yield self.text_at(index)
+
+    @property
+    def text(self):
+        """Text of all segments in this store, space separated."""
+        if not len(self):
+            return ""
+        return bytes(self._text[self._offsets[0]:self._offsets[-1]]).decode("utf-8").lstrip(" ")
+
+    @property
+    def duration(self):
+        if not len(self):
+            return 0.0
+        return self._starts[-1] + self._durations[-1] - self._starts[0]
+
+    def index_at(self, seconds):
+        """Index of the segment playing at `seconds` (the last one starting at or before it)."""
+        return max(bisect_right(self._starts, seconds) - 1, 0)
+
+    def slice(self, start_index, end_index):
+        """Segments [start_index, end_index) sharing this store's buffers."""
+        start_index, end_index, _ = slice(start_index, end_index).indices(len(self))
+        end_index = max(end_index, start_index)
+        return TranscriptSegments(
+            self._starts[start_index:end_index],
+            self._durations[start_index:end_index],
+            self._offsets[start_index:end_index + 1],
+            self._text,
+            self.language,
+        )
+
+    def slice_time(self, start_seconds, end_seconds):
+        """Segments that overlap [start_seconds, end_seconds), without copying."""
+        first = self.index_at(start_seconds)
+        if len(self) and self._starts[first] + self._durations[first] <= start_seconds:
+            first += 1
+        last = bisect_right(self._starts, end_seconds - 1e-9)
+        return self.slice(first, last)
+
+    def to_bytes(self):
+        """Serialize into one compact blob (little-endian header + raw arrays + text)."""
+        starts = array("d", self._starts)
+        durations = array("d", self._durations)
+        base = self._offsets[0] if len(self._offsets) else 0
+        offsets = array("q", (offset - base for offset in self._offsets))
+        text = bytes(self._text[base:self._offsets[-1]]) if len(self._offsets) else b""
+        language = (self.language or "").encode("utf-8")
+        return b"".join((
+            _HEADER.pack(_MAGIC, len(starts), len(text), len(language)),
+            starts.tobytes(),
+            durations.tobytes(),
+            offsets.tobytes(),
+            text,
+            language,
+        ))
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, count, text_size, language_size = _HEADER.unpack_from(blob)
+        if magic != _MAGIC:
+            raise ValueError("not a serialized TranscriptSegments blob")
+        position = _HEADER.size
+        columns = []
+        for typecode, length in (("d", count), ("d", count), ("q", count + 1)):
+            column = array(typecode)
+            column.frombytes(blob[position:position + length * column.itemsize])
+            position += length * column.itemsize
+            columns.append(column)
+        text = bytes(blob[position:position + text_size])
+        position += text_size
+        language = bytes(blob[position:position + language_size]).decode("utf-8") or None
+        return cls(*columns, text, language)
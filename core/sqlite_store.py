@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """
+    Base class for the small SQLite-backed stores in this package.
+    Keeps one connection per thread, runs the database in WAL mode so several
+    processes can read while one writes, and offers explicit transactions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn=None):
+        # connections run in autocommit mode, group multi-statement writes explicitly
+        conn = conn if conn is not None else self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
@@ -0,0 +1,253 @@
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core import outbound
+from core.budget import ContextBudget, TokenCounter, estimate_tokens
+from core.metrics import get_metrics
+
+GEMINI_MODEL = "models/gemini-flash-latest"
+
+# Transcripts longer than one request to the model can take are summarized map-reduce
+# style: every window is summarized on its own (map), then the partial notes are merged
+# into the final notes (reduce). Windows are as large as the model's context budget
+# allows; SUMMARY_CHUNK_TOKENS > 0 caps them lower, 0 leaves them at the model limit.
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "0"))
+CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", "300"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "8"))
+
+DEFAULT_PROMPT = """You are a YouTube video summarizer. You will be taking the transcript text and summarizing the entire video. Your response should have three parts: first, the entire transcript of the video in the same language, a detailed summary of the video in a large paragraph, and next to it, detailed notes in a point-wise format. Please provide a paragraph of video summary and a point-wise notes in markdown format. Please provide the summary of the text given here: """
+
+MAP_PROMPT = """You are summarizing part {index} of {total} of a long YouTube video transcript. Write detailed point-wise notes in markdown that capture every topic, fact, example and conclusion in this part. Do not add an introduction or a conclusion, the notes will be merged with the notes of the other parts: """
+
+REDUCE_PROMPT = """The text below is not a raw transcript, it is a set of partial notes, one block per consecutive part of the same video, in order. Merge them into one coherent result and remove repetition between neighbouring parts. """
+
+
+def split_transcript(transcript_text, max_chars=12000, overlap=CHUNK_OVERLAP):
+    """
+    Split a transcript into windows of at most max_chars characters.
+    Windows end on a sentence (or at least a word) boundary and the next
+    window repeats the last `overlap` characters so no sentence loses its context.
+    """
+    text = (transcript_text or "").strip()
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            cut = max(window.rfind(". "), window.rfind("? "), window.rfind("! "), window.rfind("\n"))
+            if cut < max_chars // 2:
+                cut = window.rfind(" ")
+            if cut > max_chars // 2:
+                end = start + cut + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        next_start = max(end - overlap, start + 1)
+        # start the overlap on a word boundary
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else end
+    return [chunk for chunk in chunks if chunk]
+
+
+def _build_input(prompt, text, label="Transcript"):
+    return f"""
+{prompt}
+
+{label}:
+{text}
+"""
+
+
+class Summarizer:
+    """
+    Gemini notes for a transcript, with map-reduce for long transcripts and
+    an optional SummaryCache. The map pass runs on a bounded thread pool so
+    the number of concurrent Gemini calls stays capped process-wide. Every
+    call is fitted into the model's token budget, and token usage and cost
+    are added to the `usage` object passed in, if any. With ChunkCheckpoints,
+    every finished map chunk of a video is saved, so a failed or interrupted
+    summary resumes from the chunks that are still missing. With a Hedger,
+    slow Gemini calls are sent twice and the first answer wins.
+    """
+
+    def __init__(self, client, cache=None, model=GEMINI_MODEL, max_workers=SUMMARY_WORKERS,
+                 chunk_tokens=CHUNK_TOKENS, checkpoints=None, hedger=None, pool=None):
+        self.client = client
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.hedger = hedger
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.budget = ContextBudget(model, TokenCounter(client, model))
+        self._pool = pool or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-map")
+
+    def _hedged(self, key, func, *args, discard=None, **kwargs):
+        if self.hedger is None:
+            return func(*args, **kwargs), None
+        return self.hedger.call(key, func, *args, discard=discard, **kwargs)
+
+    def _call_gemini(self, contents, usage=None):
+        with get_metrics().span("gemini_call", model=self.model) as span:
+            span["bytes_in"] = len(contents.encode("utf-8"))
+            response, hedge = self._hedged(
+                self.model,
+                outbound.call,
+                "gemini",
+                self.client.models.generate_content,
+                model=self.model,
+                contents=contents,
+            )
+            text = response.text or ""
+            span["bytes_out"] = len(text.encode("utf-8"))
+            if hedge:
+                span["hedge"] = hedge
+        if usage is not None:
+            usage.add(response.usage_metadata, hedged=hedge is not None)
+        return text
+
+    def _open_stream(self, contents):
+        stream = iter(self.client.models.generate_content_stream(model=self.model, contents=contents))
+        return next(stream, None), stream
+
+    @staticmethod
+    def _close_stream(opened):
+        """Close the stream of a hedged open that lost, so its connection is released."""
+        close = getattr(opened[1], "close", None)
+        if close is not None:
+            close()
+
+    def _window_tokens(self, prompt):
+        """Transcript tokens one call can take with `prompt`, capped by chunk_tokens if set."""
+        available = self.budget.available(prompt)
+        return min(available, self.chunk_tokens) if self.chunk_tokens else available
+
+    def _fitted_input(self, prompt, text, usage, label="Transcript"):
+        text, _, truncated = self.budget.fit(text, prompt)
+        if truncated and usage is not None:
+            usage.truncated = True
+        return _build_input(prompt, text, label)
+
+    def _map_chunk(self, contents, usage, checkpoint):
+        notes = self._call_gemini(contents, usage)
+        if checkpoint is not None:
+            self.checkpoints.save(*checkpoint, notes)
+        return notes
+
+    def _map(self, chunks, usage, video_id=None, level=0, on_progress=None):
+        """
+        Summarize all windows concurrently; results keep the transcript order.
+        Chunks with a matching checkpoint are not sent again, every other chunk
+        is checkpointed as soon as it is done, even if a sibling fails.
+        """
+        contents = [
+            self._fitted_input(MAP_PROMPT.format(index=i + 1, total=len(chunks)), chunk, usage)
+            for i, chunk in enumerate(chunks)
+        ]
+        use_checkpoints = video_id and self.checkpoints is not None
+        saved = self.checkpoints.load(video_id, self.model, level) if use_checkpoints else {}
+
+        partial_notes = [None] * len(chunks)
+        futures = {}
+        for i, chunk_contents in enumerate(contents):
+            input_hash = self.checkpoints.input_hash(chunk_contents) if use_checkpoints else None
+            if i in saved and saved[i][0] == input_hash:
+                partial_notes[i] = saved[i][1]
+                continue
+            checkpoint = (video_id, self.model, level, i, input_hash) if use_checkpoints else None
+            futures[i] = self._pool.submit(self._map_chunk, chunk_contents, usage, checkpoint)
+
+        restored = len(chunks) - len(futures)
+        if on_progress:
+            on_progress(restored, len(chunks), restored)
+        for finished, future in enumerate(as_completed(futures.values()), start=restored + 1):
+            future.result()
+            if on_progress:
+                on_progress(finished, len(chunks), restored)
+        for i, future in futures.items():
+            partial_notes[i] = future.result()
+        return partial_notes
+
+    def _prepare_final_input(self, transcript_text, prompt, usage=None, video_id=None, on_progress=None, level=0):
+        """
+        Return the contents of the last Gemini call for this transcript.
+        Short transcripts go straight to the model; long ones first run the map
+        pass and the final call becomes the reduce pass over the partial notes.
+        on_progress(done, total, restored) reports the chunks of each map pass.
+        """
+        if estimate_tokens(transcript_text) <= self._window_tokens(prompt):
+            return self._fitted_input(prompt, transcript_text.strip(), usage)
+
+        window_chars = self.budget.window_chars(transcript_text, self._window_tokens(MAP_PROMPT))
+        chunks = split_transcript(transcript_text, max_chars=window_chars)
+        partial_notes = self._map(chunks, usage, video_id, level, on_progress)
+
+        # Reduce: merge the partial notes. If they still do not fit in one call
+        # this recurses, so very long videos are reduced in several levels.
+        merged = "\n\n".join(
+            f"--- Part {i + 1} of {len(partial_notes)} ---\n{notes.strip()}"
+            for i, notes in enumerate(partial_notes)
+        )
+        reduce_window = self._window_tokens(f"{REDUCE_PROMPT}{prompt}")
+        if estimate_tokens(merged) > reduce_window and len(merged) < len(transcript_text):
+            return self._prepare_final_input(merged, prompt, usage, video_id, on_progress, level + 1)
+        return self._fitted_input(f"{REDUCE_PROMPT}{prompt}", merged, usage, label="Partial notes")
+
+    def _finished(self, video_id, prompt, summary):
+        if video_id and self.cache is not None:
+            self.cache.set(video_id, prompt, self.model, summary)
+        if video_id and self.checkpoints is not None:
+            self.checkpoints.clear(video_id, self.model)
+
+    def generate(self, transcript_text, prompt=DEFAULT_PROMPT, video_id=None, usage=None, on_progress=None):
+        if video_id and self.cache is not None:
+            summary = self.cache.get(video_id, prompt, self.model)
+            if summary is not None:
+                return summary
+
+        contents = self._prepare_final_input(transcript_text, prompt, usage, video_id, on_progress)
+        summary = self._call_gemini(contents, usage)
+        self._finished(video_id, prompt, summary)
+        return summary
+
+    def stream(self, transcript_text, prompt=DEFAULT_PROMPT, video_id=None, usage=None, on_progress=None):
+        """
+        Streaming version of generate: yields the final notes piece by piece
+        as Gemini produces them (for long videos, after the map pass).
+        The assembled text is written to the cache once the stream ends.
+        """
+        cache = self.cache if video_id else None
+        if cache is not None:
+            summary = cache.get(video_id, prompt, self.model)
+            if summary is not None:
+                yield summary
+                return
+
+        contents = self._prepare_final_input(transcript_text, prompt, usage, video_id, on_progress)
+        pieces = []
+        usage_metadata = None
+        with get_metrics().span("gemini_stream", model=self.model) as span:
+            span["bytes_in"] = len(contents.encode("utf-8"))
+            # only opening the stream is retried or hedged, a retry after the first piece would
+            # repeat text; time to the first piece has its own latency key, it is much shorter
+            (first, stream), hedge = self._hedged(
+                f"{self.model} stream", outbound.call, "gemini", self._open_stream, contents,
+                discard=self._close_stream,
+            )
+            if hedge:
+                span["hedge"] = hedge
+            for chunk in itertools.chain([first] if first is not None else [], stream):
+                # every chunk carries the running totals, the last one the final usage
+                usage_metadata = chunk.usage_metadata or usage_metadata
+                if chunk.text:
+                    pieces.append(chunk.text)
+                    yield chunk.text
+            span["bytes_out"] = sum(len(piece.encode("utf-8")) for piece in pieces)
+        if usage is not None:
+            usage.add(usage_metadata, hedged=hedge is not None)
+
+        self._finished(video_id, prompt, "".join(pieces))
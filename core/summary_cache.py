@@ -0,0 +1,258 @@
+import hashlib
+import os
+import time
+
+from core.metrics import get_metrics
+from core.sqlite_store import SQLiteStore
+
+DEFAULT_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join("cache", "summaries.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+def prompt_hash(prompt):
+    """Stable hash of a prompt, so a prompt edit never serves stale notes."""
+    return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+
+
+class SummaryCache(SQLiteStore):
+    """
+    Disk-backed summary cache keyed by (video_id, prompt hash, model name).
+
+    Backed by SQLite in WAL mode, so every Streamlit session and every worker
+    process on the machine shares the same entries and they survive restarts.
+    Entries expire after `ttl_seconds`; once the stored text grows past
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                    video_id TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, prompt_hash, model)
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, video_id, prompt, model):
+        """Return the cached summary or None. Counts a hit or a miss."""
+        return self.get_any(video_id, prompt, [model])[1]
+
+    def get_any(self, video_id, prompt, models):
+        """
+        (model, summary) of the first of `models` with a cached summary, or
+        (None, None). One lookup, counted as one hit or miss.
+        """
+        conn = self._connect()
+        digest = prompt_hash(prompt)
+        now = time.time()
+        rows = dict(conn.execute(
+            "SELECT model, summary FROM summaries WHERE video_id = ? AND prompt_hash = ? AND created_at >= ? "
+            f"AND model IN ({', '.join('?' * len(models))})",
+            (video_id, digest, now - self.ttl_seconds, *models),
+        ).fetchall())
+        for model in models:
+            if model in rows:
+                conn.execute(
+                    "UPDATE summaries SET accessed_at = ? WHERE video_id = ? AND prompt_hash = ? AND model = ?",
+                    (now, video_id, digest, model),
+                )
+                self._bump(conn, "hits")
+                get_metrics().cache("summary", hits=1)
+                return model, rows[model]
+        self._bump(conn, "misses")
+        get_metrics().cache("summary", misses=1)
+        return None, None
+
+    def set(self, video_id, prompt, model, summary):
+        """Store a summary and evict expired / least recently used entries."""
+        if not video_id or not summary:
+            return
+        conn = self._connect()
+        now = time.time()
+        with self._transaction(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, prompt_hash(prompt), model, summary, len(summary.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        evicted = conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total > self.max_bytes:
+            freed = 0
+            victims = []
+            for video_id, p_hash, model, size in conn.execute(
+                "SELECT video_id, prompt_hash, model, size FROM summaries ORDER BY accessed_at"
+            ):
+                if total - freed <= self.max_bytes:
+                    break
+                victims.append((video_id, p_hash, model))
+                freed += size
+            conn.executemany(
+                "DELETE FROM summaries WHERE video_id = ? AND prompt_hash = ? AND model = ?", victims
+            )
+            evicted += len(victims)
+        if evicted:
+            self._bump(conn, "evictions", evicted)
+
+    def stats(self):
+        """Hit/miss counters shared by all processes using the same file."""
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        counters.update(
+            entries=entries,
+            bytes=size,
+            hit_rate=(counters.get("hits", 0) / lookups) if lookups else 0.0,
+        )
+        return counters
+
+    def clear(self):
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.execute("DELETE FROM summaries")
+            conn.execute("UPDATE stats SET value = 0")
+
+
+class TranscriptCache(SQLiteStore):
+    """
+    Disk-backed cache of fetched transcripts, stored as serialized
+    TranscriptSegments blobs keyed by video_id. Shares the summary cache file
+    by default and uses the same TTL / least-recently-used size eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_accessed ON transcripts (accessed_at)")
+
+    def get(self, video_id):
+        from core.segments import TranscriptSegments
+
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT data, created_at FROM transcripts WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            self.misses += 1
+            get_metrics().cache("transcript", misses=1)
+            return None
+        try:
+            segments = TranscriptSegments.from_bytes(row[0])
+        except ValueError:
+            # written by an older serialization format, refetch it
+            self.misses += 1
+            get_metrics().cache("transcript", misses=1)
+            return None
+        conn.execute("UPDATE transcripts SET accessed_at = ? WHERE video_id = ?", (now, video_id))
+        self.hits += 1
+        get_metrics().cache("transcript", hits=1)
+        return segments
+
+    def set(self, video_id, segments):
+        data = segments.to_bytes()
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)", (video_id, data, len(data), now, now))
+            conn.execute("DELETE FROM transcripts WHERE created_at < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for victim_id, size in conn.execute("SELECT video_id, size FROM transcripts ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((victim_id,))
+                    total -= size
+                conn.executemany("DELETE FROM transcripts WHERE video_id = ?", victims)
+
+
+class ChunkCheckpoints(SQLiteStore):
+    """
+    Durable map-pass progress for long transcripts: the notes of every
+    finished chunk, keyed by (video_id, model, level, chunk index), where
+    level counts the reduce rounds of very long videos. Each row also stores
+    the hash of the chunk input, so a changed transcript or prompt never
+    resumes from stale notes. Shares the summary cache file by default.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunk_checkpoints (
+                    video_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    level INTEGER NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, model, level, chunk_index)
+                )"""
+            )
+
+    @staticmethod
+    def input_hash(contents):
+        return hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+    def load(self, video_id, model, level):
+        """{chunk_index: (input_hash, output)} of the finished chunks of one map pass."""
+        rows = self._connect().execute(
+            "SELECT chunk_index, input_hash, output FROM chunk_checkpoints "
+            "WHERE video_id = ? AND model = ? AND level = ? AND created_at >= ?",
+            (video_id, model, level, time.time() - self.ttl_seconds),
+        ).fetchall()
+        return {index: (input_hash, output) for index, input_hash, output in rows}
+
+    def save(self, video_id, model, level, chunk_index, input_hash, output):
+        # single-statement write, autocommit makes it durable before the next chunk finishes
+        self._connect().execute(
+            "INSERT OR REPLACE INTO chunk_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (video_id, model, level, chunk_index, input_hash, output, time.time()),
+        )
+
+    def models(self, video_id):
+        """The models with unfinished map passes of video_id."""
+        rows = self._connect().execute(
+            "SELECT DISTINCT model FROM chunk_checkpoints WHERE video_id = ? AND created_at >= ?",
+            (video_id, time.time() - self.ttl_seconds),
+        ).fetchall()
+        return {model for model, in rows}
+
+    def clear(self, video_id, model):
+        """Drop the checkpoints of a finished summary, and any expired ones."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chunk_checkpoints WHERE video_id = ? AND model = ?", (video_id, model))
+            conn.execute("DELETE FROM chunk_checkpoints WHERE created_at < ?", (time.time() - self.ttl_seconds,))
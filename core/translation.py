@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core import outbound
+from core.metrics import get_metrics
+from core.translation_memory import paragraph_hash
+
+TRANSLATE_CHUNK_CHARS = 4500
+TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", "4"))
+
+
+# ---------- Backends ----------
+# A backend is any object with translate(text, source, target) -> str.
+
+class GoogleTranslateBackend:
+    """
+    deep_translator's GoogleTranslator. Instances are configured once and
+    reused, one per (worker thread, source, target): GoogleTranslator.translate
+    writes the text into shared request parameters, so an instance must not be
+    used by two threads at the same time.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def translate(self, text, source, target):
+        from deep_translator import GoogleTranslator
+
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get((source, target))
+        if translator is None:
+            translator = translators[(source, target)] = GoogleTranslator(source=source, target=target)
+        return outbound.call("translate", translator.translate, text)
+
+
+class ChunkTranslator:
+    """
+    Translates long texts through a bounded thread pool. Work is done per
+    paragraph: paragraphs already in the translation memory are reused, the
+    rest are batched into chunks of at most `max_chars` and sent to the
+    backend concurrently. The request rate is capped by the backend's
+    outbound "translate" service, shared by the whole process. The output
+    keeps the paragraph order of the input.
+    """
+
+    def __init__(self, backend=None, memory=None, max_workers=TRANSLATE_WORKERS, max_chars=TRANSLATE_CHUNK_CHARS):
+        if backend is None:
+            from core.clients import translate_backend
+
+            backend = translate_backend()
+        self.backend = backend
+        self.memory = memory
+        self.max_chars = max_chars
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    def _translate_chunk(self, chunk, source, target):
+        with get_metrics().span("translate_chunk", target=target) as span:
+            span["bytes_in"] = len(chunk.encode("utf-8"))
+            translated = self.backend.translate(chunk, source, target) or ""
+            span["bytes_out"] = len(translated.encode("utf-8"))
+        return translated
+
+    def _batches(self, hashes, paragraphs):
+        """Group paragraphs into newline-joined chunks no longer than max_chars."""
+        batch, size = [], 0
+        for h in hashes:
+            length = len(paragraphs[h]) + 1
+            if batch and size + length > self.max_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(h)
+            size += length
+        if batch:
+            yield batch
+
+    def _translate_batch(self, batch, paragraphs, source, target):
+        translated = self._translate_chunk("\n".join(paragraphs[h] for h in batch), source, target)
+        lines = [line for line in translated.split("\n") if line.strip()]
+        if len(batch) == 1:
+            return {batch[0]: translated.strip()}
+        if len(lines) == len(batch):
+            return dict(zip(batch, lines))
+        # the translator merged or split lines, fall back to one request per paragraph
+        return {h: self._translate_chunk(paragraphs[h], source, target).strip() for h in batch}
+
+    def translate_many(self, text, targets, source="auto"):
+        """
+        Translate `text` into every language in `targets` in one go and
+        return {target: translated text}. All missing paragraphs of all
+        targets share the same pool, and repeated paragraphs are sent once.
+        """
+        lines = (text or "").split("\n")
+        hashes = [paragraph_hash(line) if line.strip() else None for line in lines]
+        paragraphs = {h: line.strip() for h, line in zip(hashes, lines) if h}
+
+        known = {}
+        jobs = []
+        for target in dict.fromkeys(targets):
+            known[target] = self.memory.get_many(paragraphs, source, target) if self.memory else {}
+            missing = [h for h in paragraphs if h not in known[target]]
+            jobs.extend((target, batch) for batch in self._batches(missing, paragraphs))
+
+        # map() yields results in submission order, whatever order they finish in
+        results = self._pool.map(lambda job: self._translate_batch(job[1], paragraphs, source, job[0]), jobs)
+        for (target, _), translated in zip(jobs, results):
+            known[target].update(translated)
+            if self.memory:
+                self.memory.put_many(translated, source, target)
+
+        return {
+            target: "\n".join(found[h] if h else "" for h in hashes).strip()
+            for target, found in known.items()
+        }
+
+    def translate(self, text, target, source="auto"):
+        return self.translate_many(text, [target], source)[target]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+import time
+
+from core.metrics import get_metrics
+from core.sqlite_store import SQLiteStore
+
+DEFAULT_TM_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join("cache", "translation_memory.sqlite3"))
+DEFAULT_TM_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+
+
+def paragraph_hash(paragraph):
+    return hashlib.sha256(paragraph.strip().encode("utf-8")).hexdigest()
+
+
+class TranslationMemory(SQLiteStore):
+    """
+    Persistent per-paragraph translation memory keyed by
+    (content hash of paragraph, source, target), with LRU eviction once it
+    holds more than `max_entries` translations.
+    """
+
+    def __init__(self, path=DEFAULT_TM_PATH, max_entries=DEFAULT_TM_MAX_ENTRIES):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    hash TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (hash, source, target)
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed_at)")
+
+    def get_many(self, hashes, source, target):
+        """Return {hash: translation} for the hashes already in memory."""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        conn = self._connect()
+        # stay below SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(conn.execute(
+                f"SELECT hash, translation FROM translations "
+                f"WHERE source = ? AND target = ? AND hash IN ({placeholders})",
+                (source, target, *batch),
+            ).fetchall())
+        if found:
+            now = time.time()
+            conn.executemany(
+                "UPDATE translations SET accessed_at = ? WHERE hash = ? AND source = ? AND target = ?",
+                [(now, h, source, target) for h in found],
+            )
+        with self._counter_lock:
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        get_metrics().cache("translation_memory", hits=len(found), misses=len(hashes) - len(found))
+        return found
+
+    def put_many(self, entries, source, target):
+        """Store {hash: translation} and evict the least recently used rows."""
+        if not entries:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                [(h, source, target, translation, now) for h, translation in entries.items()],
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+
+    def stats(self):
+        entries = self._connect().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core import outbound
+from core.metrics import get_metrics
+
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "128"))
+TTS_SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", "1000"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def split_sentences(text, max_chars=TTS_SEGMENT_CHARS):
+    """
+    Split text into segments of whole sentences, each at most max_chars long.
+    A single sentence longer than max_chars is cut on word boundaries.
+    """
+    segments = []
+    current = ""
+    for sentence in _SENTENCE_END.split((text or "").strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                segments.append(current)
+                current = ""
+            segments.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def gtts_engine(text, lang, slow):
+    """Synthesize MP3 bytes with gTTS, entirely in memory."""
+    from gtts import gTTS
+
+    def synthesize():
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    return outbound.call("tts", synthesize)
+
+
+class AudioCache:
+    """Thread-safe LRU cache of MP3 bytes, bounded by total size rather than entry count."""
+
+    def __init__(self, max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                get_metrics().cache("audio", misses=1)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        get_metrics().cache("audio", hits=1)
+        return audio
+
+    def put(self, key, audio):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = audio
+            self.size += len(audio)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.size}
+
+
+class TextToSpeech:
+    """
+    Text-to-speech that returns MP3 bytes and caches them by
+    (text hash, lang, slow), so replaying the same text costs no synthesis.
+    `engine` is any callable (text, lang, slow) -> bytes.
+    """
+
+    def __init__(self, engine=gtts_engine, cache=None, max_workers=TTS_WORKERS):
+        self.engine = engine
+        self.cache = cache if cache is not None else AudioCache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    @staticmethod
+    def _key(text, lang, slow):
+        return (hashlib.sha256(text.encode("utf-8")).hexdigest(), lang, bool(slow))
+
+    def synthesize(self, text, lang="en", slow=False):
+        text = text or ""
+        if not text.strip():
+            raise ValueError("Empty text passed to TTS")
+        key = self._key(text, lang, slow)
+        audio = self.cache.get(key)
+        if audio is None:
+            with get_metrics().span("tts_segment", lang=lang) as span:
+                span["bytes_in"] = len(text.encode("utf-8"))
+                audio = self.engine(text, lang, bool(slow))
+                span["bytes_out"] = len(audio)
+            self.cache.put(key, audio)
+        return audio
+
+    def synthesize_segments(self, text, lang="en", slow=False, max_chars=TTS_SEGMENT_CHARS):
+        """
+        Synthesize long text as sentence-aligned segments in parallel.
+        Yields (index, total, audio) in segment order as soon as each segment
+        and all segments before it are ready, so playback can start early.
+        """
+        segments = split_sentences(text, max_chars)
+        if not segments:
+            raise ValueError("Empty text passed to TTS")
+        futures = [self._pool.submit(self.synthesize, segment, lang, slow) for segment in segments]
+        try:
+            for index, future in enumerate(futures):
+                yield index, len(futures), future.result()
+        finally:
+            # the caller stopped early or a segment failed, drop the queued work
+            for future in futures:
+                future.cancel()
+
+    def synthesize_long(self, text, lang="en", slow=False, on_segment=None):
+        """
+        Segmented synthesis of `text` concatenated into one MP3 (MP3 frames can
+        be joined byte-wise). `on_segment(index, total, audio)` is called as
+        every segment becomes ready. The joined audio is cached as a whole too.
+        """
+        text = text or ""
+        key = self._key(text, lang, slow)
+        audio = self.cache.get(key)
+        if audio is not None:
+            if on_segment:
+                on_segment(0, 1, audio)
+            return audio
+        parts = []
+        for index, total, segment_audio in self.synthesize_segments(text, lang, slow):
+            parts.append(segment_audio)
+            if on_segment:
+                on_segment(index, total, segment_audio)
+        audio = b"".join(parts)
+        self.cache.put(key, audio)
+        return audio
@@ -0,0 +1,186 @@
+import os
+import re
+
+from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
+
+from core import clients, outbound
+from core.segments import TranscriptSegments
+
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+# The most ids / items the Data API returns per videos.list or playlistItems.list request
+MAX_RESULTS = 50
+
+_VIDEO_ID_PATTERN = re.compile(
+    r"(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)([^&?/]+)"
+)
+_PLAYLIST_PATTERN = re.compile(r"youtube\.com/.*[?&]list=([\w-]+)")
+_CHANNEL_PATTERN = re.compile(r"youtube\.com/(?:channel/(UC[\w-]+)|(@[\w.-]+)|c/([\w.-]+)|user/([\w.-]+))")
+_DURATION_PATTERN = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def extract_video_id(url):
+    match = _VIDEO_ID_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def watch_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def extract_collection(url):
+    """
+    ("playlist", id), ("channel", id), ("handle", "@name") or ("user", name)
+    for a playlist or channel URL, None otherwise. A watch URL with a list=
+    parameter is a playlist here too; callers check extract_video_id first.
+    """
+    match = _PLAYLIST_PATTERN.search(url or "")
+    if match:
+        return "playlist", match.group(1)
+    match = _CHANNEL_PATTERN.search(url or "")
+    if not match:
+        return None
+    channel_id, handle, custom, user = match.groups()
+    if channel_id:
+        return "channel", channel_id
+    if handle:
+        return "handle", handle
+    # custom /c/ names have no lookup of their own, most of them are also the handle
+    return ("handle", f"@{custom}") if custom else ("user", user)
+
+
+def _duration_seconds(duration):
+    """Seconds of an ISO 8601 duration such as "PT1H2M3S"."""
+    match = _DURATION_PATTERN.fullmatch(duration or "")
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _uploads_playlist(youtube, kind, value):
+    if kind == "channel":
+        # a channel's uploads playlist is its id with UC replaced by UU, no request needed
+        return "UU" + value[2:]
+    lookup = {"forHandle": value} if kind == "handle" else {"forUsername": value}
+    response = outbound.call("youtube", youtube.channels().list(part="contentDetails", **lookup).execute)
+    items = response.get("items") or []
+    return items[0]["contentDetails"]["relatedPlaylists"]["uploads"] if items else None
+
+
+def list_collection(url, youtube_api_key=None, limit=None):
+    """
+    Video ids of a playlist or channel URL (a channel's uploads, newest first),
+    paging through playlistItems.list 50 items per request. Returns [] when the
+    URL is not a collection or the playlist / channel does not exist.
+    """
+    collection = extract_collection(url)
+    if collection is None:
+        return []
+    youtube = clients.youtube_data_client(youtube_api_key or YOUTUBE_API_KEY)
+    kind, value = collection
+    playlist_id = value if kind == "playlist" else _uploads_playlist(youtube, kind, value)
+    if not playlist_id:
+        return []
+
+    video_ids = []
+    page_token = None
+    while limit is None or len(video_ids) < limit:
+        request = youtube.playlistItems().list(
+            part="contentDetails", playlistId=playlist_id, maxResults=MAX_RESULTS, pageToken=page_token
+        )
+        response = outbound.call("youtube", request.execute)
+        video_ids.extend(item["contentDetails"]["videoId"] for item in response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    # a playlist may list a video twice
+    video_ids = list(dict.fromkeys(video_ids))
+    return video_ids if limit is None else video_ids[:limit]
+
+
+def fetch_videos_details(video_ids, youtube_api_key=None):
+    """
+    {video_id: {"title", "description", "channel", "duration"}} from batched
+    videos.list requests, 50 ids per request (one quota unit each) instead of
+    one request per video. Private and deleted videos are left out.
+    """
+    youtube = clients.youtube_data_client(youtube_api_key or YOUTUBE_API_KEY)
+    video_ids = list(dict.fromkeys(video_ids))
+    details = {}
+    for start in range(0, len(video_ids), MAX_RESULTS):
+        batch = video_ids[start:start + MAX_RESULTS]
+        request = youtube.videos().list(part="snippet,contentDetails", id=",".join(batch), maxResults=MAX_RESULTS)
+        response = outbound.call("youtube", request.execute)
+        for item in response.get("items", []):
+            snippet = item.get("snippet", {})
+            details[item["id"]] = {
+                "title": snippet.get("title", ""),
+                "description": snippet.get("description", ""),
+                "channel": snippet.get("channelTitle", ""),
+                "duration": _duration_seconds(item.get("contentDetails", {}).get("duration")),
+            }
+    return details
+
+
+def video_details_text(details):
+    """The stand-in transcript made of a video's title and description."""
+    return f"""
+            Video Title: {details.get("title", "")}
+
+            Description:
+            {details.get("description", "")}
+            """
+
+
+def fetch_video_details(video_id, youtube_api_key=None):
+    """Title and description from the YouTube Data API, used when there is no transcript."""
+    details = fetch_videos_details([video_id], youtube_api_key).get(video_id)
+    return video_details_text(details) if details else None
+
+
+def fetch_segments(video_id, cache=None):
+    """
+    Timestamped transcript of a video as TranscriptSegments, read from and
+    written to `cache` (a TranscriptCache) when one is given. Raises
+    TranscriptsDisabled / NoTranscriptFound when there is no transcript.
+    """
+    if cache is not None:
+        segments = cache.get(video_id)
+        if segments is not None:
+            return segments
+    yt = clients.transcript_api()
+    transcript = outbound.call("transcript", yt.fetch, video_id)
+    segments = TranscriptSegments.from_items(transcript, language=getattr(transcript, "language_code", None))
+    if cache is not None:
+        cache.set(video_id, segments)
+    return segments
+
+
+def load_transcript(video_id, youtube_api_key=None, cache=None, details=None):
+    """
+    (text, segments) for a video. Falls back to its title and description,
+    with segments None, when transcripts are disabled; they are taken from
+    `details` (fetch_videos_details of a whole batch) when given, so that
+    needs no request of its own. Other errors are raised to the caller.
+    """
+    try:
+        segments = fetch_segments(video_id, cache)
+        return segments.text.strip(), segments
+
+    except (TranscriptsDisabled, NoTranscriptFound):
+        # Fallback: fetch title & description
+        if details is not None:
+            return (video_details_text(details[video_id]) if video_id in details else None), None
+        return fetch_video_details(video_id, youtube_api_key), None
+
+
+def fetch_transcript(video_id, youtube_api_key=None, cache=None):
+    """Transcript text of a video (see load_transcript)."""
+    return load_transcript(video_id, youtube_api_key, cache)[0]
+
+
+def extract_transcript_details(youtube_url, youtube_api_key=None, cache=None):
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        return None
+    return fetch_transcript(video_id, youtube_api_key, cache)
@@ -1,5 +1,22 @@
+import os
+
 import streamlit as st
 
+from core.metrics import serve_metrics
+
+# Optional Prometheus scrape endpoint, e.g. METRICS_PORT=9464
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+
+@st.cache_resource
+def start_metrics_server():
+    """Start the /metrics endpoint once per process, not on every rerun."""
+    return serve_metrics(int(METRICS_PORT))
+
+
+if METRICS_PORT:
+    start_metrics_server()
+
 #Page Set Up
 home_page = st.Page(
     page = 'pages/Home.py',
@@ -25,12 +42,19 @@ profile_page = st.Page(
     icon = '👤',
 )
 
+admin_page = st.Page(
+    page = 'pages/Admin.py',
+    title = 'Metrics',
+    icon = '📊',
+)
+
 
 
 #Navigation set up
 pg = st.navigation(
     {  "Info":[home_page,profile_page],
-       "Features":[notes_page, translate_page]
+       "Features":[notes_page, translate_page],
+       "Admin":[admin_page]
     }
 )
 
@@ -0,0 +1,126 @@
+import streamlit as st
+
+from core.clients import get_registry
+from core.metrics import get_metrics
+from core.outbound import get_outbound
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+@st.fragment(run_every=5.0)
+def show_metrics():
+    """Stage latencies, cache hit rates and recent spans, refreshed every few seconds."""
+    metrics = get_metrics()
+
+    st.markdown("<h2 class='section-header'>Pipeline Stages</h2>", unsafe_allow_html=True)
+    stages = metrics.stage_summary()
+    if stages:
+        st.dataframe(
+            [
+                {
+                    "stage": stage,
+                    "runs": s["runs"],
+                    "errors": s["errors"],
+                    "mean ms": _ms(s["mean"]),
+                    "p50 ms": _ms(s["p50"]),
+                    "p95 ms": _ms(s["p95"]),
+                    "p99 ms": _ms(s["p99"]),
+                }
+                for stage, s in stages.items()
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption("Percentiles cover the most recent runs of each stage in this server process.")
+    else:
+        st.info("No requests have been processed since the server started.")
+
+    st.markdown("<h2 class='section-header'>Caches</h2>", unsafe_allow_html=True)
+    caches = metrics.cache_summary()
+    if caches:
+        st.dataframe(
+            [{"cache": name, **c, "hit_rate": f"{c['hit_rate']:.0%}"} for name, c in caches.items()],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.info("No cache lookups yet.")
+
+    st.markdown("<h2 class='section-header'>Outbound Services</h2>", unsafe_allow_html=True)
+    services = get_outbound().stats()
+    if services:
+        st.dataframe(
+            [{"service": name, **s} for name, s in services.items()],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption("Calls, retries and time spent waiting on rate limits and backoff, per external service.")
+    else:
+        st.info("No outbound calls yet.")
+
+    st.markdown("<h2 class='section-header'>Clients</h2>", unsafe_allow_html=True)
+    clients = get_registry().stats()
+    names = sorted(set(clients["constructions"]) | set(clients["http"]))
+    if names:
+        st.dataframe(
+            [
+                {"client": name, "constructions": clients["constructions"].get(name, 0), **clients["http"].get(name, {})}
+                for name in names
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption("Clients built in this server process, and requests sent vs connections opened by their pools.")
+    else:
+        st.info("No clients built yet.")
+
+    st.markdown("<h2 class='section-header'>Recent Spans</h2>", unsafe_allow_html=True)
+    recent = metrics.recent()
+    if recent:
+        st.dataframe(
+            [{**span, "seconds": round(span["seconds"], 3)} for span in recent],
+            use_container_width=True,
+            hide_index=True,
+            column_config={"at": st.column_config.DatetimeColumn("at", format="HH:mm:ss")},
+        )
+
+    with st.expander("Prometheus metrics"):
+        text = metrics.render_prometheus()
+        st.code(text, language="text")
+        st.download_button("Download metrics", text, file_name="metrics.txt", mime="text/plain")
+
+
+def run_admin_page():
+    st.markdown(
+        """
+        <style>
+        .section-header {
+            font-size: 2em;
+            color: var(--yellow-accent);
+            border-bottom: 2px solid var(--yellow-accent);
+            padding-bottom: 5px;
+            margin-top: 1em;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # --- Authentication Check ---
+    if not st.session_state.get('logged_in', False):
+        st.warning('Please log in to access this page.')
+        st.stop()
+
+    st.title("Pipeline Metrics")
+    st.write("Where the time goes in transcript fetch, Gemini, translation, text-to-speech and exports.")
+    show_metrics()
+
+    if st.button("Reset metrics"):
+        get_metrics().reset()
+        st.rerun()
+
+
+if __name__ == "__main__":
+    run_admin_page()
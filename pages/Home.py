@@ -1,11 +1,21 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
-from google import genai
-
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-import re
-from googleapiclient.discovery import build
+import uuid
+
+from core import youtube
+from core.budget import Usage
+from core.clients import gemini_client
+from core.history_store import get_history_store
+from core.ingest import COLLECTION_MAX_VIDEOS, summarize_collection
+from core.jobs import Job, JobScheduler, SchedulerBusy
+from core.metrics import get_metrics
+from core.pipeline import generate_notes
+from core.prefetch import TranscriptPrefetcher
+from core.rag import VideoIndexStore, build_question_context, default_embedding
+from core.routing import ModelRouter
+from core.summarize import DEFAULT_PROMPT
+from core.summary_cache import ChunkCheckpoints, SummaryCache, TranscriptCache
 
 # ---------------- LOAD ENV & CONFIG ----------------
 load_dotenv()
@@ -18,9 +28,6 @@ if not GENAI_API_KEY:
 if not YOUTUBE_API_KEY:
     st.error("❌ YouTube API key not found in .env file (YOUTUBE_API_KEY)")
 
-# Create Gemini client (NEW SDK)
-client = genai.Client(api_key=GENAI_API_KEY)
-
 st.markdown(
     """
     <style>
@@ -74,66 +81,230 @@ st.markdown(
 # ---------------- UTIL FUNCTIONS ----------------
 @st.cache_data
 def extract_video_id(url):
-    pattern = re.compile(
-        r"(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)([^&?/]+)"
-    )
-    match = pattern.search(url)
-    return match.group(1) if match else None
-
-
-@st.cache_data
-def extract_transcript_details(youtube_url):
-    video_id = extract_video_id(youtube_url)
-    if not video_id:
-        return None
-
-    try:
-        yt = YouTubeTranscriptApi()
-        transcript = yt.fetch(video_id)
+    return youtube.extract_video_id(url)
 
-        text_parts = []
-        for item in transcript:
-            text_parts.append(item.text if hasattr(item, "text") else item.get("text", ""))
 
-        clean_text = " ".join(text_parts)
-        return clean_text.strip()
+@st.cache_resource
+def get_transcript_cache():
+    """Disk-backed cache of timestamped transcripts, shared by all sessions."""
+    return TranscriptCache()
 
-    except (TranscriptsDisabled, NoTranscriptFound):
-        # Fallback: fetch title & description
-        youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-        request = youtube.videos().list(part="snippet", id=video_id)
-        response = request.execute()
 
-        if response["items"]:
-            snippet = response["items"][0]["snippet"]
-            return f"""
-            Video Title: {snippet.get("title", "")}
+@st.cache_resource
+def get_prefetcher():
+    """Process-wide speculative transcript fetches, shared by all sessions."""
+    return TranscriptPrefetcher()
 
-            Description:
-            {snippet.get("description", "")}
-            """
-        return None
 
-    except Exception as e:
-        st.error(f"Transcript error: {e}")
-        return None
+def update_prefetch(video_id):
+    """Prefetch the transcript of the entered video; the prefetch of a link the user moved away from is cancelled."""
+    owner = st.session_state.setdefault("prefetch_owner", uuid.uuid4().hex)
+    if video_id:
+        get_prefetcher().prefetch(video_id, owner, YOUTUBE_API_KEY, get_transcript_cache())
+    else:
+        get_prefetcher().release(owner)
 
 
 # ---------------- GEMINI SUMMARY (FIXED) ----------------
-def generate_gemini_content(transcript_text, prompt):
-    combined_input = f"""
-{prompt}
-
-Transcript:
-{transcript_text[:12000]}
-"""
-
-    response = client.models.generate_content(
-        model="models/gemini-flash-latest",
-        contents=combined_input
-    )
-
-    return response.text
+@st.cache_resource
+def get_summarizer():
+    """
+    Process-wide summarizer shared by every session: one Gemini client (NEW SDK),
+    one bounded map-reduce pool, the disk-backed summary cache and the chunk
+    checkpoints that let a failed long summary resume where it stopped. The
+    router picks the model tier per request from the transcript length.
+    """
+    return ModelRouter(gemini_client(GENAI_API_KEY), cache=SummaryCache(), checkpoints=ChunkCheckpoints())
+
+
+def generate_gemini_content(transcript_text, prompt, video_id=None, usage=None):
+    return get_summarizer().generate(transcript_text, prompt, video_id=video_id, usage=usage)
+
+
+# ---------------- CHAT WITH THE VIDEO ----------------
+@st.cache_resource
+def get_video_indexes():
+    """Process-wide vector indexes of transcripts, built once per video and reused for every question."""
+    return VideoIndexStore(default_embedding(gemini_client(GENAI_API_KEY) if GENAI_API_KEY else None))
+
+
+def answer_question(video_id, transcript, segments, question):
+    """Answer from the top-k transcript chunks only; returns (answer, chunks, usage dict)."""
+    with get_metrics().span("rag_question", video_id=video_id):
+        index = get_video_indexes().get_or_build(video_id, transcript, segments)
+        prompt, context, chunks = build_question_context(index, question)
+        usage = Usage(get_summarizer().model)
+        answer = generate_gemini_content(context, prompt, usage=usage)
+    return answer, chunks, usage.as_dict()
+
+
+def show_video_chat():
+    """Questions and answers about the video whose notes were generated last."""
+    video_id = st.session_state.get("video_id")
+    transcript = st.session_state.get("transcript")
+    if not video_id or not transcript:
+        return
+    st.markdown("---")
+    st.subheader("Chat with this video")
+    chat = st.session_state.get("video_chat")
+    if not chat or chat["video_id"] != video_id:
+        chat = st.session_state["video_chat"] = {"video_id": video_id, "messages": []}
+
+    for message in chat["messages"]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("caption"):
+                st.caption(message["caption"])
+
+    question = st.chat_input("Ask something about this video")
+    if not question:
+        return
+    with st.chat_message("user"):
+        st.markdown(question)
+    with st.chat_message("assistant"):
+        try:
+            with st.spinner("Searching the transcript..."):
+                answer, chunks, usage = answer_question(
+                    video_id, transcript, st.session_state.get("transcript_segments"), question
+                )
+        except Exception as e:
+            st.error(f"Could not answer the question: {e}")
+            return
+        caption = (
+            f"Answered from {len(chunks)} transcript excerpt(s), "
+            f"{usage['input_tokens']:,} input / {usage['output_tokens']:,} output tokens"
+        )
+        st.markdown(answer)
+        st.caption(caption)
+    chat["messages"].append({"role": "user", "content": question})
+    chat["messages"].append({"role": "assistant", "content": answer, "caption": caption})
+
+
+# ---------------- BACKGROUND JOBS ----------------
+@st.cache_resource
+def get_job_scheduler():
+    """Process-wide scheduler, so a job outlives the page run that started it."""
+    return JobScheduler()
+
+
+def run_notes_job(job, youtube_url, summarizer, prompt, transcript_cache, fetched=None):
+    # end-to-end time of one "Get Detailed Notes" request; the stages are timed inside generate_notes
+    with get_metrics().span("notes_job", video_id=job.key, prefetched=fetched is not None):
+        return generate_notes(
+            youtube_url, summarizer, prompt, YOUTUBE_API_KEY,
+            on_text=job.append_partial, transcript_cache=transcript_cache, on_progress=job.set_progress,
+            fetched=fetched,
+        )
+
+
+@st.fragment(run_every=1.0)
+def show_notes_job(stream_output):
+    """Poll the running notes job once a second and collect its result."""
+    info = st.session_state.get("notes_job")
+    if not info:
+        return
+    job = get_job_scheduler().get(info["id"])
+    if job is None:
+        st.session_state.pop("notes_job")
+        st.warning("The notes job was lost (the server may have restarted). Please try again.")
+        return
+
+    if not job.done():
+        st.info("Fetching transcript and generating summary in the background. You can leave this page and come back.")
+        progress = job.progress
+        if progress and progress["total"] and progress["done"] < progress["total"]:
+            restored = f" ({progress['restored']} restored from an earlier attempt)" if progress["restored"] else ""
+            st.progress(
+                progress["done"] / progress["total"],
+                text=f"Summarized {progress['done']} of {progress['total']} transcript chunks{restored}",
+            )
+        if stream_output and job.partial:
+            st.markdown(job.partial)
+        return
+
+    st.session_state.pop("notes_job")
+    if job.status == Job.FAILED:
+        st.error(job.error)
+        if job.progress and job.progress["done"]:
+            st.info(
+                f"{job.progress['done']} of {job.progress['total']} transcript chunks were saved. "
+                "Click \"Get Detailed Notes\" again to continue from there."
+            )
+        return
+    st.session_state["summary"] = job.result["summary"]
+    st.session_state["transcript"] = job.result["transcript"]
+    # compact timestamped segments (None when only title/description were available)
+    st.session_state["transcript_segments"] = job.result["segments"]
+    st.session_state["video_id"] = job.result["video_id"]
+    if st.session_state.logged_in:
+        get_history_store().add(
+            st.session_state.username, info["youtube_link"], job.result["summary"], video_id=job.result["video_id"],
+            transcript=job.result["transcript"],
+        )
+    st.session_state["summary_usage"] = job.result["usage"]
+    st.session_state["transcript_normalization"] = job.result["normalization"]
+    st.session_state["show_new_summary"] = True
+    st.rerun()
+
+
+def run_collection_job(job, collection_url, summarizer, prompt, transcript_cache, limit):
+    with get_metrics().span("collection_job"):
+        return summarize_collection(
+            collection_url, summarizer, prompt, YOUTUBE_API_KEY, transcript_cache, limit=limit,
+            on_result=lambda done, total, result: job.set_progress(done, total),
+        )
+
+
+@st.fragment(run_every=1.0)
+def show_collection_job():
+    """Poll the running playlist / channel job and collect its results."""
+    info = st.session_state.get("collection_job")
+    if not info:
+        return
+    job = get_job_scheduler().get(info["id"])
+    if job is None:
+        st.session_state.pop("collection_job")
+        st.warning("The playlist job was lost (the server may have restarted). Please try again.")
+        return
+
+    if not job.done():
+        st.info("Fetching the videos and generating their notes in the background. You can leave this page and come back.")
+        progress = job.progress
+        if progress and progress["total"]:
+            st.progress(progress["done"] / progress["total"],
+                        text=f"Summarized {progress['done']} of {progress['total']} videos")
+        return
+
+    st.session_state.pop("collection_job")
+    if job.status == Job.FAILED:
+        st.error(job.error)
+        return
+    if st.session_state.logged_in:
+        for result in job.result:
+            if result["status"] == "ok":
+                get_history_store().add(
+                    st.session_state.username, result["url"], result["summary"], video_id=result["video_id"],
+                    transcript=result["transcript"],
+                )
+    # the transcripts are only needed for the search index, keep the session small
+    st.session_state["collection_results"] = [
+        {key: result.get(key) for key in ("title", "url", "status", "summary", "error")} for result in job.result
+    ]
+    st.rerun()
+
+
+def show_collection_results():
+    results = st.session_state["collection_results"]
+    done = sum(result["status"] == "ok" for result in results)
+    st.subheader("Playlist Notes")
+    st.caption(f"Notes for {done} of {len(results)} videos" + (", saved to your history." if st.session_state.logged_in else "."))
+    for result in results:
+        with st.expander(result["title"]):
+            st.caption(result["url"])
+            if result["status"] == "ok":
+                st.markdown(result["summary"])
+            else:
+                st.warning(result["error"])
 
 
 # ---------------- MAIN APP ----------------
@@ -229,23 +400,75 @@ def run_home_page():
         st.title("YouTube Transcript to Detailed Notes Converter")
         youtube_link = st.text_input("Enter YouTube Video Link:")
 
-        prompt = """You are a YouTube video summarizer. You will be taking the transcript text and summarizing the entire video. Your response should have three parts: first, the entire transcript of the video in the same language, a detailed summary of the video in a large paragraph, and next to it, detailed notes in a point-wise format. Please provide a paragraph of video summary and a point-wise notes in markdown format. Please provide the summary of the text given here: """
+        prompt = DEFAULT_PROMPT
+
+        video_id = extract_video_id(youtube_link) if youtube_link else None
+        if video_id:
+            st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+        # the transcript is fetched while the user looks at the thumbnail, the click then only waits for Gemini
+        update_prefetch(video_id)
+
+        collection = None
+        if youtube_link and not video_id:
+            collection = youtube.extract_collection(youtube_link)
+        if collection:
+            st.info("This is a playlist or channel link: the notes of its videos are generated together.")
+            max_videos = st.number_input("Number of videos", min_value=1, max_value=500, value=COLLECTION_MAX_VIDEOS)
+            if st.button("Summarize All Videos"):
+                try:
+                    job = get_job_scheduler().submit(
+                        f"collection:{youtube_link}:{max_videos}", run_collection_job, youtube_link, get_summarizer(),
+                        prompt, get_transcript_cache(), max_videos,
+                    )
+                    st.session_state["collection_job"] = {"id": job.id}
+                    st.session_state.pop("collection_results", None)
+                except SchedulerBusy as e:
+                    st.warning(f"The server is busy. {e}")
+        if "collection_job" in st.session_state:
+            show_collection_job()
+        elif "collection_results" in st.session_state:
+            show_collection_results()
+
+        stream_output = st.toggle("Show notes while they are generated", value=True)
 
-        if youtube_link:
+        if st.button("Get Detailed Notes"):
             video_id = extract_video_id(youtube_link)
             if video_id:
-                st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
-
-        if st.button("Get Detailed Notes"):
-            with st.spinner('Fetching transcript and generating summary...'):
-                transcript_text = extract_transcript_details(youtube_link)
-                if transcript_text:
-                    summary = generate_gemini_content(transcript_text, prompt)
-                    st.session_state["summary"] = summary
-                    st.session_state["transcript"] = transcript_text
-                    st.write(summary)
-                else:
-                    st.error("Could not fetch transcript or video details. Please check the URL or try another video.")
+                try:
+                    # Requests for the same video share one background job
+                    job = get_job_scheduler().submit(
+                        video_id, run_notes_job, youtube_link, get_summarizer(), prompt, get_transcript_cache(),
+                        get_prefetcher().take(video_id),
+                    )
+                    st.session_state["notes_job"] = {"id": job.id, "youtube_link": youtube_link}
+                except SchedulerBusy as e:
+                    st.warning(f"The server is busy. {e}")
+            else:
+                st.error("Could not fetch transcript or video details. Please check the URL or try another video.")
+
+        if "notes_job" in st.session_state:
+            show_notes_job(stream_output)
+        elif st.session_state.pop("show_new_summary", False):
+            st.write(st.session_state.summary)
+            usage = st.session_state.get("summary_usage")
+            if usage and usage["calls"]:
+                st.caption(
+                    f"{usage['calls']} Gemini call(s), {usage['input_tokens']:,} input / "
+                    f"{usage['output_tokens']:,} output tokens, about ${usage['cost_usd']:.4f} "
+                    f"on {usage['model'].removeprefix('models/')}"
+                    + (" (transcript shortened to fit the model)" if usage["truncated"] else "")
+                )
+            elif usage:
+                st.caption("Served from the summary cache, no Gemini tokens used.")
+            normalization = st.session_state.get("transcript_normalization")
+            if normalization and normalization["chars_removed"]:
+                st.caption(
+                    f"Transcript cleanup removed {normalization['chars_removed']:,} characters "
+                    f"(about {normalization['tokens_removed']:,} tokens) of caption noise."
+                )
+
+        if "notes_job" not in st.session_state:
+            show_video_chat()
     else:
         # --- Login/Register Forms ---
         st.write("")
@@ -1,8 +1,6 @@
 import streamlit as st
-import io
-from fpdf import FPDF, FPDF_FONT_DIR
-import os 
-from docx import Document # Import the docx library
+
+from core.exports import FORMATS, get_export, pdf_missing_glyphs
 
 
 def run_summary_page():
@@ -42,43 +40,6 @@ def run_summary_page():
         st.warning('Please log in or start a free trial to access this page.')
         st.stop()
 
-    # --- Reusable function to generate download data ---
-    def get_download_data(format, content):
-        # if format == "PDF":
-        #     pdf = FPDF()
-        #     pdf.add_page()
-            
-        #     # Use a Unicode-compatible font
-        #     # pdf.add_font("DejaVuSansCondensed", "", os.path.join(FPDF_FONT_DIR, "DejaVuSansCondensed.ttf"), uni=True)
-        #     font_path = os.path.join("fonts", "DejaVuSansCondensed.ttf")
-        #     pdf.add_font("DejaVuSansCondensed", "", font_path, uni=True)
-        #     pdf.set_font("DejaVuSansCondensed", "", 12)
-
-            
-        #     # Ensure content is a string and handle markdown
-        #     content = content.replace('*', '').replace('**', '').replace('###', '')
-        #     pdf.multi_cell(0, 10, content)
-        #     return pdf.output(dest='S').encode('latin1')
-        
-        if format == "Word":
-            # Create a new Word document
-            doc = Document()
-            doc.add_paragraph(content)
-            
-            # Save the document to a BytesIO object
-            doc_stream = io.BytesIO()
-            doc.save(doc_stream)
-            doc_stream.seek(0)
-            return doc_stream.getvalue()
-        
-        elif format == "Text":
-            # Remove markdown formatting for plain text
-            plain_text = content.replace('*', '').replace('**', '').replace('###', '')
-            return plain_text.encode('utf-8')
-        
-        return b"" # Return empty bytes if format is not recognized
-
-
     # --- Main Page Content ---
     if 'summary' in st.session_state and st.session_state.summary:
         st.markdown("---")
@@ -92,27 +53,29 @@ def run_summary_page():
         # Selectbox for format
         download_format = st.selectbox(
             "Choose a format for your notes:",
-            options=[ "Word", "Text"]
+            options=["Word", "PDF", "Text"]
         )
 
-        # Map format to a correct file extension and MIME type
-        format_map = {
-            "PDF": {"ext": "pdf", "mime": "application/pdf"},
-            "Word": {"ext": "docx", "mime": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
-            "Text": {"ext": "txt", "mime": "text/plain"},
-        }
+        download_file_name = f"summary.{FORMATS[download_format]['ext']}"
+        summary = st.session_state.summary
 
-        download_file_name = f"summary.{format_map[download_format]['ext']}"
-        download_data = get_download_data(download_format, st.session_state.summary)
-
-        # The Download button
-        st.download_button(
-            label=f"Download as {download_format}",
-            data=download_data,
-            file_name=download_file_name,
-            mime=format_map[download_format]['mime'],
-            help=f"Click to download your notes as a {download_format} file."
-        )
+        missing = pdf_missing_glyphs(summary) if download_format == "PDF" else ""
+        if missing:
+            st.warning(
+                f"No font for these characters is installed ({missing[:10]}), so the PDF would come out "
+                "blank. Download the notes as Word or Text instead."
+            )
+        else:
+            # The Download button. The file is only rendered when the button is clicked,
+            # and memoized per (summary, format) so repeated downloads are served as-is.
+            st.download_button(
+                label=f"Download as {download_format}",
+                data=lambda: get_export(download_format, summary),
+                on_click="ignore",
+                file_name=download_file_name,
+                mime=FORMATS[download_format]['mime'],
+                help=f"Click to download your notes as a {download_format} file."
+            )
 
     else:
         st.info("Please go to the main page and enter a YouTube link to generate notes.")
@@ -1,8 +1,10 @@
 import streamlit as st
-from deep_translator import GoogleTranslator
-from gtts import gTTS
-import tempfile
-import os
+
+from core.metrics import get_metrics
+from core.outbound import CircuitOpen
+from core.translation import ChunkTranslator
+from core.translation_memory import TranslationMemory
+from core.tts import TextToSpeech
 
 st.markdown(
     """
@@ -54,6 +56,18 @@ st.markdown(
 )
 
 
+@st.cache_resource
+def get_chunk_translator():
+    """One translator pool, rate limiter and translation memory for the whole process, shared by all sessions."""
+    return ChunkTranslator(memory=TranslationMemory())
+
+
+@st.cache_resource
+def get_text_to_speech():
+    """Process-wide TTS with an in-memory audio cache bounded by size."""
+    return TextToSpeech()
+
+
 def run_translate_page():
     # --- Authentication Check ---
     if not st.session_state.get('logged_in', False) and not st.session_state.get('is_trial', False):
@@ -62,69 +76,67 @@ def run_translate_page():
 
     # ---------- Helpers ----------
 
-    def _chunk_text(text: str, max_chars: int = 4500):
-        """
-        Split a long text into smaller chunks so GoogleTranslator
-        does not fail on very large inputs.
-        """
-        text = text or ""
-        if len(text) <= max_chars:
-            return [text]
-
-        chunks = []
-        current = ""
-        for para in text.split("\n"):
-            # ensure we don't exceed max_chars
-            if len(current) + len(para) + 1 <= max_chars:
-                if current:
-                    current += "\n" + para
-                else:
-                    current = para
-            else:
-                if current:
-                    chunks.append(current)
-                current = para
-        if current:
-            chunks.append(current)
-        return chunks
-
-    def translate_text(text, target_language):
+    def translate_text_many(text, target_languages):
         try:
-            chunks = _chunk_text(text, max_chars=4500)
-            translated_chunks = []
-            for chunk in chunks:
-                if chunk.strip():
-                    translated_chunks.append(
-                        GoogleTranslator(source='auto', target=target_language).translate(chunk)
-                    )
-            return "\n\n".join(translated_chunks) if translated_chunks else ""
+            with get_metrics().span("translate", targets=",".join(target_languages), bytes_in=len(text.encode("utf-8"))):
+                return get_chunk_translator().translate_many(text, target_languages)
+        except CircuitOpen as e:
+            st.warning(f"{e}. Showing the original text.")
+            return {lang: text for lang in target_languages}  # fallback: return original text
         except Exception as e:
             st.error(f"Translation failed: {e}")
-            return text  # fallback: return original text
+            return {lang: text for lang in target_languages}  # fallback: return original text
 
     def text_to_speech(text, lang='en', speed=1.0):
         """
-        Convert text to speech using gTTS.
+        Convert text to speech using gTTS and return the MP3 bytes.
         gTTS only has a 'slow' flag, so we approximate speed:
         - speed < 1.0  -> slow=True
         - speed >= 1.0 -> slow=False
         """
         try:
-            text = text or ""
-            if not text.strip():
-                raise ValueError("Empty text passed to TTS")
-
             slow_speed = True if speed < 1.0 else False
-            tts = gTTS(text, lang=lang, slow=slow_speed)
+            with get_metrics().span("tts", lang=lang, bytes_in=len(text.encode("utf-8"))) as span:
+                audio = get_text_to_speech().synthesize(text, lang=lang, slow=slow_speed)
+                span["bytes_out"] = len(audio)
+            return audio
+        except CircuitOpen as e:
+            st.warning(str(e))
+            return None
+        except Exception as e:
+            st.error(f"Text-to-speech failed: {e}")
+            return None
+
+    def long_text_to_speech(text, lang='en', speed=1.0):
+        """
+        text_to_speech for long texts such as the full transcript. Sentence
+        segments are synthesized in parallel; the first one is playable while
+        the rest are still being generated and a progress bar tracks them.
+        """
+        progress = st.progress(0.0, text="Generating audio...")
+        preview = st.empty()
+
+        def on_segment(index, total, audio):
+            progress.progress((index + 1) / total, text=f"Generated {index + 1} of {total} audio segments")
+            if index == 0 and total > 1:
+                with preview.container():
+                    st.caption("Part 1 is ready while the rest is being generated:")
+                    st.audio(audio, format="audio/mpeg")
 
-            # Use a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                tts.save(temp_file.name)
-                temp_file_path = temp_file.name
-            return temp_file_path
+        try:
+            slow_speed = True if speed < 1.0 else False
+            with get_metrics().span("tts_long", lang=lang, bytes_in=len(text.encode("utf-8"))) as span:
+                audio = get_text_to_speech().synthesize_long(text, lang=lang, slow=slow_speed, on_segment=on_segment)
+                span["bytes_out"] = len(audio)
+            return audio
+        except CircuitOpen as e:
+            st.warning(str(e))
+            return None
         except Exception as e:
             st.error(f"Text-to-speech failed: {e}")
             return None
+        finally:
+            progress.empty()
 
     # --- Define the languages here (for simplicity, kept in a dictionary) ---
     languages = {
@@ -177,16 +189,29 @@ def run_translate_page():
             "Select language for translation:",
             options=list(languages.keys())
         )
-        
+        extra_languages = st.multiselect(
+            "Also translate into (optional):",
+            options=[name for name in languages if name != selected_language]
+        )
+
         if st.button("Translate Notes"):
             with st.spinner('Translating...'):
                 target_lang = languages[selected_language]
-                translated_summary = translate_text(st.session_state.summary, target_lang)
+                targets = [selected_language] + extra_languages
+                translations = translate_text_many(
+                    st.session_state.summary, [languages[name] for name in targets]
+                )
+                translated_summary = translations[target_lang]
                 st.session_state["translated_summary"] = translated_summary
                 st.session_state["translated_lang"] = target_lang
 
-            st.write(f"**Translated Summary ({selected_language}):**")
-            st.write(translated_summary)
+            if extra_languages:
+                for tab, name in zip(st.tabs(targets), targets):
+                    with tab:
+                        st.write(translations[languages[name]])
+            else:
+                st.write(f"**Translated Summary ({selected_language}):**")
+                st.write(translated_summary)
 
         st.markdown("---")
         st.markdown("<h2 class='section-header'>Listen to the Notes</h2>", unsafe_allow_html=True)
@@ -200,20 +225,17 @@ def run_translate_page():
         with col1:
             if st.button("Play Full Transcript", disabled=not transcript_exists):
                 if transcript_exists:
-                    with st.spinner('Generating audio...'):
-                        audio_file = text_to_speech(st.session_state.transcript, lang='en', speed=speed_factor)
-                    if audio_file:
-                        st.audio(audio_file)
-                        os.remove(audio_file)
+                    audio_bytes = long_text_to_speech(st.session_state.transcript, lang='en', speed=speed_factor)
+                    if audio_bytes:
+                        st.audio(audio_bytes, format="audio/mpeg")
 
         # ---- Play Summary ----
         with col2:
             if st.button("Play Summary"):
                 with st.spinner('Generating audio...'):
-                    audio_file = text_to_speech(st.session_state.summary, lang='en', speed=speed_factor)
-                if audio_file:
-                    st.audio(audio_file)
-                    os.remove(audio_file)
+                    audio_bytes = text_to_speech(st.session_state.summary, lang='en', speed=speed_factor)
+                if audio_bytes:
+                    st.audio(audio_bytes, format="audio/mpeg")
 
         # ---- Play Translated Summary ----
         translated_summary_exists = "translated_summary" in st.session_state and bool(st.session_state.translated_summary)
@@ -222,14 +244,13 @@ def run_translate_page():
         if st.button(btn_label, disabled=not translated_summary_exists):
             if translated_summary_exists:
                 with st.spinner('Generating audio...'):
-                    audio_file = text_to_speech(
+                    audio_bytes = text_to_speech(
                         st.session_state.translated_summary,
                         lang=st.session_state.get('translated_lang', 'en'),
                         speed=speed_factor
                     )
-                if audio_file:
-                    st.audio(audio_file)
-                    os.remove(audio_file)
+                if audio_bytes:
+                    st.audio(audio_bytes, format="audio/mpeg")
 
     else:
         st.info("Please go to the main page and enter a YouTube link to generate notes.")
@@ -1,16 +1,12 @@
 import streamlit as st
-import os
-import json
 import re # Add this import for the regex pattern
 
-# --- Helper Functions for Data Persistence ---
-def load_user_data():
-    """Load user data from the JSON file."""
-    DB_FILE = "user_data.json"
-    if not os.path.exists(DB_FILE):
-        return {}
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
+from core.exports import FORMATS, build_zip
+from core.history_store import get_history_store
+from core.search import snippet
+
+HISTORY_PAGE_SIZE = 10
+SEARCH_RESULTS = 20
 
 # --- Reusable function from Home.py (moved here for this page's logic) ---
 def extract_video_id(youtube_video_url):
@@ -85,28 +81,76 @@ def run_profile_page():
     st.markdown("---")
     st.markdown("<h2 class='section-header'>History of Notes</h2>", unsafe_allow_html=True)
 
-    user_data = load_user_data()
+    store = get_history_store()
     username = st.session_state.username
 
-    # Check if the user exists and has a history
-    if username in user_data and "history" in user_data[username] and user_data[username]["history"]:
-        history = user_data[username]["history"]
+    # Check if the user has a history
+    total = store.count(username)
+    query = st.text_input("Search your notes", placeholder="e.g. transformers, ट्रांसफॉर्मर") if total else ""
+    if query.strip():
+        results = store.search(username, query, limit=SEARCH_RESULTS)
+        st.caption(f"{len(results)} matching notes" if results else "No notes match your search.")
+        for item in results:
+            summary = store.get_summary(item["id"])
+            with st.expander(f"**{item.get('timestamp', '')}:** {item.get('youtube_link', 'Unknown Link')}"):
+                st.write(summary or "No summary found.")
+            st.caption(snippet(summary, query))
+    elif total:
+        # Only the visible page of history is queried and rendered
+        page_count = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        page = 1
+        if page_count > 1:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        st.caption(f"Page {page} of {page_count} ({total} notes)")
+
+        offset = (page - 1) * HISTORY_PAGE_SIZE
+        history = store.list_history(username, offset=offset, limit=HISTORY_PAGE_SIZE)
         # Display history in reverse chronological order
-        for i, item in enumerate(reversed(history)):
-            with st.expander(f"**Video {len(history) - i}:** {item.get('youtube_link', 'Unknown Link')}"):
-                
+        for i, item in enumerate(history):
+            expander = st.expander(
+                f"**Video {total - offset - i}:** {item.get('youtube_link', 'Unknown Link')}",
+                key=f"history_item_{item['id']}",
+                on_change="rerun",
+            )
+            with expander:
+                # The summary body and thumbnail are only loaded once the expander is opened
+                if not expander.open:
+                    continue
+
                 # Check for a timestamp, which was added in a previous step
-                if 'timestamp' in item:
+                if item.get('timestamp'):
                     st.write(f"**Date:** {item.get('timestamp', 'N/A')}")
                 
                 st.write("**Summary:**")
-                st.write(item.get("summary", "No summary found."))
+                st.write(store.get_summary(item["id"]) or "No summary found.")
 
                 # Display video thumbnail
-                video_id = extract_video_id(item.get('youtube_link', ''))
+                video_id = item.get('video_id') or extract_video_id(item.get('youtube_link', ''))
                 if video_id:
                     st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", width=200)
 
+    if total:
+        # --- Bulk export ---
+        st.markdown("---")
+        st.markdown("<h2 class='section-header'>Export All Notes</h2>", unsafe_allow_html=True)
+        zip_format = st.selectbox("Format of the exported notes:", options=["Word", "PDF", "Text"], key="zip_format")
+
+        def history_zip():
+            # built only when the button is clicked, one document at a time
+            documents = (
+                (f"{item['timestamp'] or item['id']}_{item['video_id'] or 'video'}", item["summary"] or "")
+                for item in store.iter_history(username)
+            )
+            return build_zip(documents, zip_format)
+
+        st.download_button(
+            label=f"Download all {total} notes as ZIP",
+            data=history_zip,
+            on_click="ignore",
+            file_name=f"notes_{FORMATS[zip_format]['ext']}.zip",
+            mime="application/zip",
+        )
+
     else:
         st.info("You have no history yet. Generate some notes on the Home page to get started!")
 